@@ -6,13 +6,13 @@ from datetime import datetime
 import time
 import traceback
 import requests
+from requests.adapters import HTTPAdapter
 import flet as ft
 import logging
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver import ChromeOptions
-from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_pool import APP_DATA_DIR, WebDriverPool, create_chrome_service
 import urllib3
 from bs4 import BeautifulSoup
 import base64
@@ -60,11 +60,18 @@ except ImportError:
     Image = None
 import xml.etree.ElementTree as ET
 import threading
-from collections import Counter
+from collections import Counter, OrderedDict, deque
+from itertools import islice
+from functools import lru_cache
 import string
 import ast
 import re
 import hashlib
+import zlib
+import sqlite3
+import email.utils
+import contextlib
+import contextvars
 import pandas as pd
 import os
 import certifi
@@ -72,13 +79,27 @@ import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 os.environ['SSL_CERT_FILE'] = certifi.where()
 import threading
-from urllib.parse import urljoin, urlparse
+import asyncio
+from urllib.parse import urldefrag, urljoin, urlparse, urlsplit
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    print("⚠️ Предупреждение: Модуль 'lxml' не установлен. Парсер будет разбирать HTML медленнее. Установите: pip install lxml")
+    lxml_html = None
+
+try:
+    import aiohttp
+except ImportError:
+    print("⚠️ Предупреждение: Модуль 'aiohttp' не установлен. Парсер будет работать медленнее через потоки. Установите: pip install aiohttp")
+    aiohttp = None
 
 # Подавление логов Selenium и Chrome
 logging.getLogger('selenium').setLevel(logging.WARNING)
 logging.getLogger('webdriver_manager').setLevel(logging.WARNING)
 logging.getLogger('urllib3').setLevel(logging.WARNING)
 logging.getLogger('requests').setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
 
 # Подавление логов Chrome
 os.environ['WDM_LOG_LEVEL'] = '0'
@@ -94,6 +115,53 @@ os.environ['WDM_SSL_VERIFY'] = '0'
 LOG_FILE = "seo_log.txt"
 SCREENSHOT_DIR = "screenshots"
 REPORT_DIR = "reports"
+CRAWL_MAX_CONCURRENCY = 200  # Глобальный лимит одновременных запросов парсера
+CRAWL_STATE_DB = os.path.join(APP_DATA_DIR, "crawl_state.db")  # Состояние обхода парсера для продолжения после остановки
+CRAWL_CHECKPOINT_PAGES = 100  # Контрольная точка парсера каждые N страниц...
+CRAWL_CHECKPOINT_SECONDS = 10  # ...или каждые N секунд
+CRAWL_PROGRESS_SECONDS = 0.5  # Прогресс парсера в интерфейсе обновляется не чаще раза в N секунд
+CRAWL_EXPORT_CHUNK = 1000  # Размер порции при чтении результатов парсера для экспорта
+PARSER_TABLE_LIMIT = 1000  # Сколько строк результатов парсера показывать в таблице интерфейса
+HOST_MAX_BACKOFF = 60  # Максимальный интервал (сек) между запросами к хосту после 429/503
+HOST_BACKOFF_RETRIES = 2  # Сколько раз повторять запрос после 429/503
+AIMD_MIN_CONCURRENCY = 2  # Нижняя граница адаптивного лимита параллельных запросов
+AIMD_SLOW_FACTOR = 3  # Ответ медленнее средней задержки в N раз считается признаком перегрузки
+CRAWL_MAX_HTML_BYTES = 2 * 1024 * 1024  # Парсер читает не больше N байт HTML со страницы
+HTTP_CONNECT_TIMEOUT = 5  # Таймаут установки соединения (сек) для всех HTTP-проверок
+HTTP_READ_TIMEOUT = 10  # Таймаут чтения ответа (сек) по умолчанию
+HTTP_POOL_HOSTS = 100  # Сколько хостов держать в пуле соединений
+HTTP_POOL_SIZE = 100  # Соединений на хост в пуле
+AUDIT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Кэш ответов аудита держит не больше N байт тел, старые вытесняются
+LINK_CHECK_CONCURRENCY = 32  # Сколько ссылок страницы проверять одновременно
+LINK_CHECK_PER_HOST = 6  # Не больше N одновременных проверок ссылок на один хост
+MULTI_SITE_WORKERS = 4  # Сколько сайтов пакетная проверка ссылок обрабатывает одновременно
+# Разделы пакетного отчета: ключ в результатах run_links_test -> (суффикс файла, заголовок)
+BATCH_REPORT_SECTIONS = {
+    'seo_summary': ('seo', "# 📊 SEO Анализ всех сайтов"),
+    'links_summary': ('links', "# 📊 Анализ ссылок всех сайтов"),
+    'images_summary': ('images', "# 📊 Анализ изображений всех сайтов"),
+    'full_summary': ('full', "# 📊 Общая сводка всех сайтов"),
+}
+IMAGE_CHECK_CONCURRENCY = 16  # Сколько изображений измерять одновременно
+IMAGE_SIZE_READ_LIMIT = 2 * 1024 * 1024  # Без Content-Length читаем изображение не дальше N байт
+LINK_CACHE_DB = os.path.join(APP_DATA_DIR, "link_cache.db")  # Кэш статусов ссылок между запусками
+LINK_CACHE_TTL = 24 * 3600  # Сколько секунд результат проверки ссылки считается свежим
+LINK_CACHE_MAX_ENTRIES = 200000  # Максимум записей в кэше ссылок
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'  # Пространство имен протокола sitemap
+SITEMAP_MAX_URLS = 50000  # Лимит URL в одном файле sitemap по протоколу
+SITEMAP_FETCH_TIMEOUT = 10  # Таймаут чтения sitemap (сек)
+SITEMAP_FETCH_WORKERS = 8  # Сколько вложенных sitemap из sitemap index загружать одновременно
+SITEMAP_MAX_TOTAL_URLS = 500000  # Не больше N URL со всех sitemap одного обхода
+SITEMAP_MAX_TOTAL_BYTES = 200 * 1024 * 1024  # Не больше N загруженных байт со всех sitemap одного обхода
+SITEMAP_PROGRESS_INTERVAL = 0.5  # Как часто (сек) сообщать о ходе проверки URL из sitemap
+SITEMAP_SNAPSHOT_DB = os.path.join(APP_DATA_DIR, "sitemap_snapshots.db")  # Снимки sitemap сайтов для повторных проверок
+SITEMAP_RECHECK_AGE = 7 * 24 * 3600  # Доступный URL без изменений lastmod перепроверяется не чаще раза в N сек
+COVERAGE_CRAWL_MAX_AGE = 7 * 24 * 3600  # Обход парсера старше N сек не используется для сравнения с sitemap
+HTTP_DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
+}
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 os.makedirs(REPORT_DIR, exist_ok=True)
 
@@ -211,7 +279,7 @@ def create_webdriver(ignore_ssl=False, window_size=None, anti_bot_mode=False):
         options.add_argument("--ignore-ssl-errors")
     
     try:
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        driver = webdriver.Chrome(service=create_chrome_service(), options=options)
         
         if anti_bot_mode:
             # Дополнительные скрипты для обхода детекции
@@ -220,13 +288,32 @@ def create_webdriver(ignore_ssl=False, window_size=None, anti_bot_mode=False):
             driver.execute_script("Object.defineProperty(navigator, 'languages', {get: () => ['ru-RU', 'ru', 'en-US', 'en']})")
         
         driver.set_page_load_timeout(60)
-        driver.implicitly_wait(10)
+        # Без неявного ожидания: проверки наличия элементов работают по уже загруженному DOM
+        # и не ждут 10 секунд на каждом отсутствующем теге; где нужно — явные ожидания
+        driver.implicitly_wait(0)
         driver.set_script_timeout(30)
         return driver
     except Exception as e:
         log_to_file(f"Ошибка создания WebDriver: {str(e)}")
         raise e
 
+# Общий пул браузеров; профиль пула — режим проверки SSL
+webdriver_pool = WebDriverPool(lambda ignore_ssl: create_webdriver(ignore_ssl=ignore_ssl))
+
+def checkout_webdriver(ignore_ssl=False, window_size=None, anti_bot_mode=False):
+    """Берет WebDriver из пула вместо запуска нового Chrome (параметры как у create_webdriver).
+
+    В режиме обхода блокировок браузер не переиспользуется: каждый запуск
+    должен получить свои случайные User-Agent, разрешение и язык.
+    """
+    if anti_bot_mode:
+        return create_webdriver(ignore_ssl=ignore_ssl, window_size=window_size, anti_bot_mode=True)
+    return webdriver_pool.checkout(ignore_ssl, window_size)
+
+def checkin_webdriver(driver, discard=False):
+    """Возвращает в пул WebDriver, полученный через checkout_webdriver."""
+    webdriver_pool.checkin(driver, discard)
+
 def try_multiple_access_methods(site_url, ignore_ssl=False):
     """Пытается получить доступ к сайту различными методами."""
     methods_results = []
@@ -443,32 +530,838 @@ def save_results(site_url, log_content, summary_content, report_type='full', for
     df.to_excel(report_path, index=False)
     return report_path
 
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    """Возвращает общую requests.Session приложения.
+
+    Сессия держит пулы соединений по хостам (keep-alive), повторяет запрос
+    при ошибках соединения и отправляет браузерные заголовки по умолчанию.
+    Через нее ходят все проверки, поэтому аудит сайта переиспользует
+    уже установленные TCP/TLS соединения.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                session.headers.update(HTTP_DEFAULT_HEADERS)
+                # Повторяем только сбои соединения; 429/503 обрабатывает host_scheduler
+                retry = urllib3.util.Retry(total=2, connect=2, read=0, status=0,
+                                           backoff_factor=0.3, raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _http_session = session
+    return _http_session
+
+def _http_timeout(timeout):
+    """Число превращает в пару (connect, read) с отдельным таймаутом соединения."""
+    if isinstance(timeout, (int, float)):
+        return (min(HTTP_CONNECT_TIMEOUT, timeout), timeout)
+    return timeout
+
+class ResponseCache:
+    """Кэш HTTP-ответов в пределах одного аудита.
+
+    Ключ — метод, URL и параметры запроса (кроме таймаута). Ответы 429/503
+    не кэшируются, чтобы повтор после паузы ушел в сеть. Суммарный размер
+    тел ограничен max_bytes: при переполнении вытесняются давно не
+    запрошенные ответы, а ответ больше лимита не сохраняется.
+    """
+
+    def __init__(self, force_link_recheck=False, max_bytes=AUDIT_CACHE_MAX_BYTES):
+        self._responses = OrderedDict()  # key -> (response, размер тела)
+        self._bytes = 0
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Проверять ссылки заново, не используя link_status_cache
+        self.force_link_recheck = force_link_recheck
+        # Размеры изображений (КБ) по URL
+        self.image_sizes = {}
+
+    @staticmethod
+    def make_key(method, url, kwargs):
+        options = []
+        for name, value in sorted(kwargs.items()):
+            if isinstance(value, dict):
+                value = tuple(sorted(value.items()))
+            options.append((name, repr(value)))
+        return method, url, tuple(options)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._responses.move_to_end(key)
+            return entry[0]
+
+    def peek(self, key):
+        """Проверяет наличие ответа, не меняя счетчики."""
+        with self._lock:
+            return key in self._responses
+
+    def put(self, key, response):
+        if response.status_code in (429, 503):
+            return
+        size = len(response.content or b'')
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._responses.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._responses[key] = (response, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._responses.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def summary(self):
+        return f"{self.hits} попаданий, {self.misses} промахов"
+
+# Активный кэш текущего аудита; вне аудита запросы идут напрямую
+_audit_response_cache = contextvars.ContextVar('audit_response_cache', default=None)
+
+def begin_audit_cache(force_link_recheck=False):
+    """Включает кэш ответов для http_get/http_head на время аудита.
+
+    Возвращает (cache, token); token передается в end_audit_cache.
+    force_link_recheck отключает для аудита постоянный кэш статусов ссылок.
+    Кэш привязан к контексту, поэтому параллельные аудиты в других потоках
+    его не видят; потоки самого аудита должны запускаться через
+    contextvars.copy_context() (asyncio.to_thread делает это сам).
+    """
+    cache = ResponseCache(force_link_recheck)
+    return cache, _audit_response_cache.set(cache)
+
+def end_audit_cache(token, label=None):
+    """Отключает кэш аудита, включенный begin_audit_cache.
+
+    С label пишет в лог итоговую статистику кэша: она считается здесь,
+    после всех шагов аудита, включая robots.txt и sitemap.
+    """
+    cache = _audit_response_cache.get()
+    _audit_response_cache.reset(token)
+    if label and cache is not None:
+        log_to_file(f"{label} - HTTP-кэш аудита: {cache.summary()}")
+
+@contextlib.contextmanager
+def ensure_audit_cache():
+    """Кэш ответов на время блока, если аудит его еще не включил.
+
+    Нужен отдельным проверкам (sitemap, экспорт) вне run_test, чтобы
+    robots.txt и sitemap загружались один раз.
+    """
+    cache = _audit_response_cache.get()
+    if cache is not None:
+        yield cache
+        return
+    cache, token = begin_audit_cache()
+    try:
+        yield cache
+    finally:
+        end_audit_cache(token)
+
+def _cache_key(method, url, kwargs):
+    """Ключ кэша аудита для запроса или None, если кэш не используется."""
+    if _audit_response_cache.get() is None or kwargs.get('stream'):
+        return None
+    return ResponseCache.make_key(method, url, kwargs)
+
+def is_response_cached(method, url, **kwargs):
+    """True, если такой запрос уже есть в кэше текущего аудита."""
+    if method == 'GET':
+        kwargs.setdefault('allow_redirects', True)
+    else:
+        kwargs.setdefault('allow_redirects', False)
+    key = _cache_key(method, url, kwargs)
+    return key is not None and _audit_response_cache.get().peek(key)
+
+def _cached_request(method, url, timeout, kwargs):
+    cache = _audit_response_cache.get()
+    key = _cache_key(method, url, kwargs)
+    if key is not None:
+        response = cache.get(key)
+        if response is not None:
+            return response
+    response = get_http_session().request(method, url, timeout=_http_timeout(timeout), **kwargs)
+    if key is not None:
+        cache.put(key, response)
+    return response
+
+def http_get(url, timeout=HTTP_READ_TIMEOUT, **kwargs):
+    """GET через общую сессию; аргументы как у requests.get."""
+    kwargs.setdefault('allow_redirects', True)
+    return _cached_request('GET', url, timeout, kwargs)
+
+def http_head(url, timeout=HTTP_READ_TIMEOUT, **kwargs):
+    """HEAD через общую сессию; аргументы как у requests.head."""
+    kwargs.setdefault('allow_redirects', False)
+    return _cached_request('HEAD', url, timeout, kwargs)
+
+def create_aiohttp_session(ignore_ssl, limit, read_timeout=HTTP_READ_TIMEOUT):
+    """Создает aiohttp-сессию парсера с теми же заголовками и таймаутами, что у get_http_session."""
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=read_timeout)
+    connector = aiohttp.TCPConnector(limit=limit, ssl=False if ignore_ssl else True)
+    return aiohttp.ClientSession(timeout=timeout, connector=connector, headers=HTTP_DEFAULT_HEADERS)
+
+class HostScheduler:
+    """Общий планировщик вежливости по хостам (token bucket).
+
+    Интервал между запросами к хосту берется из Crawl-delay в robots.txt и
+    увеличивается при ответах 429/503 (с учетом Retry-After), а на успешных
+    ответах постепенно возвращается к базовому. Хосты без ограничений
+    запрашиваются без задержек. Используется парсером, проверкой ссылок и
+    check_redirects; безопасен для вызова из нескольких потоков.
+    """
+
+    def __init__(self, burst=1, max_backoff=HOST_MAX_BACKOFF):
+        self.burst = burst
+        self.max_backoff = max_backoff
+        self.hosts = {}
+        self.robots_loaded = set()
+        self.lock = threading.Lock()
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = {'base': 0.0, 'penalty': 0.0, 'tokens': float(self.burst), 'updated': time.monotonic(), 'blocked_until': 0.0}
+            self.hosts[host] = state
+        return state
+
+    def set_crawl_delay(self, host, delay):
+        """Задает базовый интервал (сек) между запросами к хосту."""
+        with self.lock:
+            self._state(host.lower())['base'] = max(0.0, float(delay))
+
+    def ensure_robots(self, url, ignore_ssl):
+        """Один раз за сессию читает Crawl-delay из robots.txt хоста url."""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        with self.lock:
+            if not host or host in self.robots_loaded:
+                return
+            self.robots_loaded.add(host)
+        try:
+            r = http_get(f"{parsed.scheme}://{parsed.netloc}/robots.txt", timeout=5, verify=not ignore_ssl)
+            if r.status_code == 200:
+                delay = get_robots_crawl_delay(r.text)
+                if delay:
+                    self.set_crawl_delay(host, delay)
+        except Exception:
+            pass  # robots.txt может отсутствовать — это не критично
+
+    def reserve(self, url):
+        """Резервирует слот для запроса к хосту url и возвращает время ожидания в секундах."""
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            state = self._state(host)
+            now = time.monotonic()
+            wait = max(0.0, state['blocked_until'] - now)
+            interval = max(state['base'], state['penalty'])
+            if interval <= 0:
+                return wait
+            state['tokens'] = min(float(self.burst), state['tokens'] + (now - state['updated']) / interval)
+            state['updated'] = now
+            state['tokens'] -= 1
+            if state['tokens'] < 0:
+                wait = max(wait, -state['tokens'] * interval)
+            return wait
+
+    def wait(self, url):
+        """Блокирующее ожидание слота (для потоков)."""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url):
+        """Ожидание слота в event loop (для парсера)."""
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def report(self, url, status, headers=None):
+        """Учитывает ответ сервера: 429/503 замедляют хост, успешные ответы снимают замедление.
+
+        Возвращает True, если запрос стоит повторить после ожидания.
+        """
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            state = self._state(host)
+            if status in (429, 503):
+                retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+                state['penalty'] = min(self.max_backoff, max(state['penalty'] * 2, state['base'], 0.5))
+                if retry_after is not None:
+                    state['blocked_until'] = max(state['blocked_until'], time.monotonic() + min(retry_after, self.max_backoff))
+                # Следующие запросы распределяются с новым интервалом начиная с момента разблокировки
+                state['tokens'] = min(state['tokens'], 1.0)
+                state['updated'] = max(state['updated'], state['blocked_until'])
+                return True
+            if isinstance(status, int) and status < 500 and state['penalty'] > 0:
+                state['penalty'] = state['penalty'] / 2 if state['penalty'] > 0.1 else 0.0
+            return False
+
+def parse_retry_after(value):
+    """Разбирает заголовок Retry-After (секунды или HTTP-дата) в секунды."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+host_scheduler = HostScheduler()
+
+class AdaptiveConcurrency:
+    """Адаптивный лимит одновременных запросов (AIMD).
+
+    Пока ответы приходят быстро и без ошибок, лимит растет примерно на 1 за
+    каждое «окно» из limit запросов. Таймауты, ошибки соединения и ответы 5xx
+    уменьшают лимит вдвое (не чаще раза в секунду). Ответы медленнее
+    AIMD_SLOW_FACTOR x средней задержки лимит не увеличивают.
+
+    slot() используется из потоков, async_slot() — из event loop парсера.
+    Оба отдают словарь, в который вызывающий код записывает 'status' ответа.
+    """
+
+    def __init__(self, initial=20, min_limit=AIMD_MIN_CONCURRENCY, max_limit=CRAWL_MAX_CONCURRENCY):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.in_flight = 0
+        self.avg_latency = None
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+        self._async_cond = None
+
+    @property
+    def current(self):
+        """Текущий лимит одновременных запросов."""
+        return int(self.limit)
+
+    def _observe(self, latency, ok):
+        with self.cond:
+            now = time.monotonic()
+            if not ok:
+                if now - self.last_decrease >= 1.0:
+                    self.limit = max(float(self.min_limit), self.limit / 2)
+                    self.last_decrease = now
+                return
+            slow = self.avg_latency is not None and latency > self.avg_latency * AIMD_SLOW_FACTOR
+            self.avg_latency = latency if self.avg_latency is None else self.avg_latency * 0.9 + latency * 0.1
+            if not slow:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def _finish(self, outcome, start):
+        status = outcome.get('status')
+        self._observe(time.monotonic() - start, not (isinstance(status, int) and status >= 500))
+
+    @contextlib.contextmanager
+    def slot(self):
+        with self.cond:
+            while self.in_flight >= self.current:
+                self.cond.wait()
+            self.in_flight += 1
+        outcome = {}
+        start = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            self._observe(time.monotonic() - start, False)
+            raise
+        else:
+            self._finish(outcome, start)
+        finally:
+            with self.cond:
+                self.in_flight -= 1
+                self.cond.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self):
+        if self._async_cond is None:
+            self._async_cond = asyncio.Condition()
+        cond = self._async_cond
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight < self.current)
+            self.in_flight += 1
+        outcome = {}
+        start = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            self._observe(time.monotonic() - start, False)
+            raise
+        else:
+            self._finish(outcome, start)
+        finally:
+            async with cond:
+                self.in_flight -= 1
+                cond.notify_all()
+
+def _request_with_backoff(method, url, ignore_ssl):
+    """Запрос с redirect-ами через host_scheduler: пауза перед запросом и повтор после 429/503."""
+    request = http_get if method == 'GET' else http_head
+    for attempt in range(HOST_BACKOFF_RETRIES + 1):
+        # Повтор из кэша аудита не должен ждать очереди к хосту
+        if not is_response_cached(method, url, verify=not ignore_ssl, allow_redirects=True):
+            host_scheduler.wait(url)
+        response = request(url, timeout=5, verify=not ignore_ssl, allow_redirects=True)
+        if not host_scheduler.report(url, response.status_code, response.headers) or attempt == HOST_BACKOFF_RETRIES:
+            return response
+
 def check_resource(url, ignore_ssl):
     """Проверяет доступность ресурса и возвращает статус, время, историю редиректов."""
     try:
-        response = requests.get(url, timeout=5, verify=not ignore_ssl, allow_redirects=True)
+        response = _request_with_backoff('GET', url, ignore_ssl)
         return url, response.status_code, response.elapsed.total_seconds(), response.history
     except Exception as e:
         return url, f"Error: {str(e)}", 0, []
 
+class LinkStatusCache:
+    """Постоянный кэш результатов проверки ссылок (SQLite) между запусками.
+
+    Хранит статус, конечный URL, цепочку редиректов и время ответа. Записи
+    старше ttl секунд считаются устаревшими и удаляются, размер кэша
+    ограничен max_entries (сначала удаляются самые старые проверки).
+    Кэшируются только окончательные ответы: ошибки соединения, 429 и 5xx
+    всегда проверяются заново.
+    """
+
+    def __init__(self, db_path=LINK_CACHE_DB, ttl=LINK_CACHE_TTL, max_entries=LINK_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.conn = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS link_status (
+                    url TEXT NOT NULL,
+                    verify INTEGER NOT NULL,
+                    status INTEGER NOT NULL,
+                    final_url TEXT,
+                    history TEXT,
+                    latency REAL,
+                    checked_at REAL NOT NULL,
+                    PRIMARY KEY (url, verify)
+                )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_link_status_checked ON link_status (checked_at)')
+            self._evict()
+        return self.conn
+
+    def _evict(self):
+        self.conn.execute("DELETE FROM link_status WHERE checked_at < ?", (time.time() - self.ttl,))
+        self.conn.execute('''
+            DELETE FROM link_status WHERE rowid IN (
+                SELECT rowid FROM link_status ORDER BY checked_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_entries,))
+        self.conn.commit()
+
+    def get(self, url, ignore_ssl):
+        """Возвращает свежую запись о ссылке или None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT status, final_url, history, latency, checked_at FROM link_status WHERE url = ? AND verify = ? AND checked_at >= ?",
+                (url, int(not ignore_ssl), time.time() - self.ttl)).fetchone()
+        if row is None:
+            return None
+        status, final_url, history, latency, checked_at = row
+        return {'url': url, 'status': status, 'final_url': final_url, 'history': json.loads(history or '[]'),
+                'latency': latency, 'checked_at': checked_at, 'cached': True}
+
+    def put(self, record, ignore_ssl):
+        status = record['status']
+        if not isinstance(status, int) or status == 429 or status >= 500:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute('''
+                INSERT OR REPLACE INTO link_status (url, verify, status, final_url, history, latency, checked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (record['url'], int(not ignore_ssl), status, record['final_url'],
+                  json.dumps(record['history'], ensure_ascii=False), record['latency'], record['checked_at']))
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._evict()
+            else:
+                conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM link_status")
+            self.conn.commit()
+
+# Общий кэш статусов ссылок для всех проверок
+link_status_cache = LinkStatusCache()
+
+class SitemapSnapshotStore:
+    """Снимки sitemap сайтов (SQLite) для повторных проверок.
+
+    Для каждого URL хранит lastmod, последний статус и время проверки.
+    По прошлому снимку check_sitemap_urls решает, какие URL проверять
+    заново, а diff показывает, что изменилось с прошлого запуска.
+    """
+
+    def __init__(self, db_path=SITEMAP_SNAPSHOT_DB):
+        self.db_path = db_path
+        self.conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS sitemap_snapshot (
+                    site TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    lastmod TEXT,
+                    status TEXT NOT NULL,
+                    checked_at REAL NOT NULL,
+                    PRIMARY KEY (site, url)
+                )
+            ''')
+            self.conn.commit()
+        return self.conn
+
+    @staticmethod
+    def site_key(site_url):
+        return (urlparse(site_url).netloc or site_url).lower()
+
+    def load(self, site_url):
+        """Прошлый снимок сайта: {url: {'lastmod', 'status', 'checked_at'}}."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT url, lastmod, status, checked_at FROM sitemap_snapshot WHERE site = ?",
+                (self.site_key(site_url),)).fetchall()
+        return {url: {'lastmod': lastmod, 'status': status, 'checked_at': checked_at} for url, lastmod, status, checked_at in rows}
+
+    def save(self, site_url, page_details):
+        """Заменяет снимок сайта текущими page_details."""
+        site = self.site_key(site_url)
+        rows = {}
+        for details in page_details:
+            if details['url']:
+                rows[details['url']] = (site, details['url'], details['lastmod'], details['status'], details.get('checked_at', time.time()))
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM sitemap_snapshot WHERE site = ?", (site,))
+                conn.executemany('''
+                    INSERT INTO sitemap_snapshot (site, url, lastmod, status, checked_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows.values())
+
+    @staticmethod
+    def diff(previous, page_details):
+        """Изменения относительно прошлого снимка.
+
+        Возвращает {'added': [url], 'removed': [url], 'changed': [(url, что
+        изменилось)]}; changed — новый статус или lastmod.
+        """
+        current = {details['url']: details for details in page_details if details['url']}
+        added = [url for url in current if url not in previous]
+        removed = [url for url in previous if url not in current]
+        changed = []
+        for url, details in current.items():
+            old = previous.get(url)
+            if old is None:
+                continue
+            changes = []
+            if old['status'] != details['status']:
+                changes.append(f"статус {old['status']} → {details['status']}")
+            if old['lastmod'] != details['lastmod']:
+                changes.append(f"lastmod {old['lastmod']} → {details['lastmod']}")
+            if changes:
+                changed.append((url, ', '.join(changes)))
+        return {'added': added, 'removed': removed, 'changed': changed}
+
+# Снимки sitemap для инкрементальных повторных проверок
+sitemap_snapshots = SitemapSnapshotStore()
+
+def _link_record(url, response=None, error=None):
+    """Запись о проверке ссылки в формате LinkStatusCache."""
+    if response is None:
+        return {'url': url, 'status': f"Error: {error}", 'final_url': None, 'history': [],
+                'latency': 0, 'checked_at': time.time(), 'cached': False}
+    return {'url': url, 'status': response.status_code, 'final_url': response.url,
+            'history': [[hop.status_code, hop.headers.get('Location', hop.url)] for hop in response.history],
+            'latency': response.elapsed.total_seconds(), 'checked_at': time.time(), 'cached': False}
+
+def probe_link(url, ignore_ssl):
+    """Проверяет ссылку по сети: сначала HEAD, при неудаче полный GET.
+
+    GET выполняется, если сервер не поддерживает HEAD или вернул ошибку
+    (часть серверов отвечает на HEAD 403/404/405, хотя страница доступна).
+    """
+    try:
+        response = _request_with_backoff('HEAD', url, ignore_ssl)
+        if response.status_code < 400:
+            return _link_record(url, response)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        # Хост недоступен — GET ответит так же, не тратим на него еще один таймаут
+        return _link_record(url, error=str(e))
+    except Exception:
+        pass
+    try:
+        return _link_record(url, _request_with_backoff('GET', url, ignore_ssl))
+    except Exception as e:
+        return _link_record(url, error=str(e))
+
+def link_recheck_forced():
+    """True, если текущий аудит запущен с принудительной перепроверкой ссылок."""
+    cache = _audit_response_cache.get()
+    return bool(cache and cache.force_link_recheck)
+
+def check_link(url, ignore_ssl, force_recheck=None):
+    """Возвращает запись о ссылке из link_status_cache или проверяет ее заново.
+
+    force_recheck=None берет настройку текущего аудита (begin_audit_cache).
+    """
+    if force_recheck is None:
+        force_recheck = link_recheck_forced()
+    if not force_recheck:
+        record = link_status_cache.get(url, ignore_ssl)
+        if record is not None:
+            return record
+    record = probe_link(url, ignore_ssl)
+    link_status_cache.put(record, ignore_ssl)
+    return record
+
+def check_link_status(url, ignore_ssl):
+    """Возвращает HTTP статус ссылки в формате check_resource: число или строка "Error: ..."."""
+    return check_link(url, ignore_ssl)['status']
+
+def validate_links(hrefs, ignore_ssl, max_concurrency=LINK_CHECK_CONCURRENCY, per_host=LINK_CHECK_PER_HOST, stop_event=None, on_result=None, recheck=()):
+    """Проверяет список ссылок параллельно и возвращает {href: статус}.
+
+    Повторяющиеся href проверяются один раз, порядок ключей — порядок первого
+    появления ссылки. Общую параллельность ограничивает AdaptiveConcurrency,
+    на один хост одновременно идет не больше per_host запросов. Свежие
+    результаты берутся из link_status_cache без запросов к сайту.
+    on_result(href, статус, готово, всего) вызывается в вызывающем потоке
+    по мере завершения проверок. href из recheck проверяются по сети
+    в любом случае.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    force_recheck = link_recheck_forced()
+
+    unique_hrefs = list(dict.fromkeys(hrefs))
+    if not unique_hrefs:
+        return {}
+
+    host_slots = {}
+    host_slots_lock = threading.Lock()
+
+    def host_slot(url):
+        host = urlparse(url).netloc
+        with host_slots_lock:
+            if host not in host_slots:
+                host_slots[host] = threading.BoundedSemaphore(per_host)
+            return host_slots[host]
+
+    recheck = set(recheck)
+
+    def check_single(url):
+        if not force_recheck and url not in recheck:
+            record = link_status_cache.get(url, ignore_ssl)
+            if record is not None:
+                return record['status']
+        if stop_event and stop_event.is_set():
+            return "Error: проверка остановлена"
+        with host_slot(url):
+            with limiter.slot() as outcome:
+                record = probe_link(url, ignore_ssl)
+                outcome['status'] = record['status'] if isinstance(record['status'], int) else 599
+        link_status_cache.put(record, ignore_ssl)
+        return record['status']
+
+    max_workers = max(1, min(max_concurrency, len(unique_hrefs)))
+    limiter = AdaptiveConcurrency(initial=min(LINK_CHECK_PER_HOST * 2, max_workers), max_limit=max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Каждой задаче своя копия контекста, чтобы работал кэш ответов аудита
+        futures = {url: executor.submit(contextvars.copy_context().run, check_single, url) for url in unique_hrefs}
+        if on_result is not None:
+            urls_by_future = {future: url for url, future in futures.items()}
+            for done, future in enumerate(as_completed(urls_by_future), 1):
+                on_result(urls_by_future[future], future.result(), done, len(urls_by_future))
+        return {url: future.result() for url, future in futures.items()}
+
+def check_sitemap_urls(page_details, ignore_ssl, progress_callback=None, stop_event=None, previous=None, max_age=SITEMAP_RECHECK_AGE):
+    """Параллельно проверяет доступность URL из sitemap и заполняет status и checked_at в page_details.
+
+    Проверка идет через validate_links (HEAD, при ошибке GET; паузы
+    host_scheduler; кэш ссылок). Статусы записываются в те же словари
+    page_details по мере ответов, поэтому данные, уже отданные в
+    sitemap_export_data, обновляются во время проверки. progress_callback
+    (готово, всего) вызывается не чаще раза в SITEMAP_PROGRESS_INTERVAL сек.
+
+    previous — прошлый снимок sitemap ({url: запись} из SitemapSnapshotStore).
+    Статус из него берется без запроса, если URL был доступен, lastmod не
+    изменился и проверка моложе max_age секунд; недоступные в прошлый раз
+    URL и URL с изменившимся lastmod проверяются по сети мимо
+    link_status_cache. При принудительной
+    перепроверке ссылок снимок не используется. Возвращает число
+    проверенных по сети URL.
+    """
+    now = time.time()
+    if link_recheck_forced():
+        previous = None
+    details_by_url = {}
+    recheck = set()  # Недоступные в прошлый раз или изменившиеся URL: кэшу ссылок не верим
+    for details in page_details:
+        url = details['url']
+        details['checked_at'] = now
+        if not (url and url.startswith('http')):
+            continue
+        old = previous.get(url) if previous else None
+        if old and old['status'] == 'ОК' and old['lastmod'] == details['lastmod'] and now - old['checked_at'] < max_age:
+            details['status'] = old['status']
+            details['checked_at'] = old['checked_at']
+            continue
+        if old and (old['status'] != 'ОК' or old['lastmod'] != details['lastmod']):
+            recheck.add(url)
+        details['status'] = 'проверяется'
+        details_by_url.setdefault(url, []).append(details)
+    if not details_by_url:
+        return 0
+
+    last_report = 0.0
+
+    def on_result(url, http_status, done, total):
+        nonlocal last_report
+        status = 'ОК' if isinstance(http_status, int) and http_status == 200 else f'не ОК ({http_status})'
+        for details in details_by_url[url]:
+            details['status'] = status
+        if progress_callback and (done == total or time.monotonic() - last_report >= SITEMAP_PROGRESS_INTERVAL):
+            last_report = time.monotonic()
+            progress_callback(done, total)
+
+    validate_links(list(details_by_url), ignore_ssl, stop_event=stop_event, on_result=on_result, recheck=recheck)
+    return len(details_by_url)
+
+def _content_range_total(value):
+    """Полный размер из заголовка Content-Range ("bytes 0-0/12345")."""
+    match = re.match(r'\s*bytes\s+[\d*-]+/(\d+)', value or '')
+    return int(match.group(1)) if match else None
+
+def _streamed_image_size(response):
+    """Размер изображения по ответу 200: Content-Length или потоковое чтение до IMAGE_SIZE_READ_LIMIT."""
+    if response.headers.get('Content-Length', '').isdigit():
+        return int(response.headers['Content-Length'])
+    size = 0
+    for chunk in response.iter_content(64 * 1024):
+        size += len(chunk)
+        if size >= IMAGE_SIZE_READ_LIMIT:
+            break
+    return size
+
+def probe_image_size(url, ignore_ssl):
+    """Определяет размер изображения в байтах, по возможности без скачивания.
+
+    Сначала HEAD и Content-Length, затем GET с Range: bytes=0-0 (размер из
+    Content-Range). Если сервер отдает файл целиком без длины или не знает
+    полный размер (Content-Range: bytes 0-0/*), тело читается потоком до
+    IMAGE_SIZE_READ_LIMIT. Возвращает 0, если изображение недоступно.
+    """
+    response = http_head(url, timeout=5, verify=not ignore_ssl, allow_redirects=True)
+    if response.status_code == 200 and response.headers.get('Content-Length', '').isdigit() \
+            and not response.headers.get('Content-Encoding'):
+        return int(response.headers['Content-Length'])
+    with http_get(url, timeout=5, verify=not ignore_ssl, stream=True,
+                  headers={'Range': 'bytes=0-0', 'Accept-Encoding': 'identity'}) as response:
+        if response.status_code == 200:
+            return _streamed_image_size(response)
+        if response.status_code != 206:
+            return 0
+        total = _content_range_total(response.headers.get('Content-Range'))
+        if total is not None:
+            return total
+    # Полный размер неизвестен, а тело частичного ответа — один байт: читаем файл без Range
+    with http_get(url, timeout=5, verify=not ignore_ssl, stream=True,
+                  headers={'Accept-Encoding': 'identity'}) as response:
+        if response.status_code != 200:
+            return 0
+        return _streamed_image_size(response)
+
 def get_image_size(url, ignore_ssl):
-    """Получает размер изображения в КБ."""
+    """Получает размер изображения в КБ (с кэшем в пределах аудита)."""
+    cache = _audit_response_cache.get()
+    if cache is not None and url in cache.image_sizes:
+        return cache.image_sizes[url]
     try:
-        response = requests.get(url, timeout=5, verify=not ignore_ssl)
+        size_kb = probe_image_size(url, ignore_ssl) / 1024
+    except Exception:
+        size_kb = 0
+    if cache is not None:
+        cache.image_sizes[url] = size_kb
+    return size_kb
+
+def get_image_sizes(urls, ignore_ssl, max_workers=IMAGE_CHECK_CONCURRENCY):
+    """Параллельно получает размеры изображений: {url: КБ}, каждый URL один раз."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_urls)))) as executor:
+        futures = {url: executor.submit(contextvars.copy_context().run, get_image_size, url, ignore_ssl) for url in unique_urls}
+        return {url: future.result() for url, future in futures.items()}
+
+def get_robots_sitemap_urls(robots_content):
+    """URL из директив Sitemap: в robots.txt в порядке появления."""
+    sitemap_urls = []
+    for line in (robots_content or '').splitlines():
+        if line.strip().lower().startswith('sitemap:'):
+            sitemap_url = line.split(':', 1)[1].strip()
+            if sitemap_url:
+                sitemap_urls.append(sitemap_url)
+    return sitemap_urls
+
+def get_site_sitemap_urls(site_url, ignore_ssl):
+    """Sitemap сайта: из Sitemap: в robots.txt (в том числе .xml.gz), без них — /sitemap.xml."""
+    sitemap_urls = []
+    try:
+        response = http_get(f"{site_url.rstrip('/')}/robots.txt", timeout=5, verify=not ignore_ssl)
         if response.status_code == 200:
-            return len(response.content) / 1024
-        return 0
-    except:
-        return 0
+            sitemap_urls = get_robots_sitemap_urls(response.text)
+    except Exception:
+        pass  # robots.txt может отсутствовать — это не критично
+    return list(dict.fromkeys(sitemap_urls)) or [f"{site_url.rstrip('/')}/sitemap.xml"]
 
 def check_seo_files(site_url, ignore_ssl):
-    """Проверяет доступность robots.txt и sitemap.xml."""
+    """Проверяет доступность robots.txt и sitemap.xml.
+
+    Для sitemap.xml берется первый sitemap из get_site_sitemap_urls, а его
+    содержимое возвращается байтами: кодировку и gzip разбирает iter_sitemap.
+    """
     results = []
     for file in ["robots.txt", "sitemap.xml"]:
-        url = f"{site_url.rstrip('/')}/{file}"
+        url = f"{site_url.rstrip('/')}/{file}" if file == "robots.txt" else get_site_sitemap_urls(site_url, ignore_ssl)[0]
         try:
-            response = requests.get(url, timeout=5, verify=not ignore_ssl)
-            results.append((file, response.status_code == 200, response.text if response.status_code == 200 else ""))
+            response = http_get(url, timeout=5, verify=not ignore_ssl)
+            if file == "robots.txt":
+                content = response.text if response.status_code == 200 else ""
+            else:
+                content = response.content if response.status_code == 200 else b""
+            results.append((file, response.status_code == 200, content))
         except Exception as e:
             results.append((file, False, str(e)))
     return results
@@ -547,6 +1440,41 @@ def analyze_robots_txt(robots_content):
 
     return errors, positives, found_directives, recommendations
 
+def get_robots_crawl_delay(robots_content, user_agent='*'):
+    """Возвращает Crawl-delay (сек) из robots.txt для user_agent или None.
+
+    Понимает стандартную запись внутри группы User-agent ('Crawl-delay: 10')
+    и запись вида 'Crawl-delay: <bot> <delay>', которую проверяет analyze_robots_txt.
+    """
+    delays = {}
+    group_agents = []
+    in_group_rules = False
+    for line in robots_content.splitlines():
+        line = line.split('#', 1)[0].strip()
+        parts = line.split(':', 1)
+        if len(parts) != 2:
+            continue
+        directive, value = parts[0].lower().strip(), parts[1].strip()
+        if directive == 'user-agent':
+            if in_group_rules:
+                group_agents = []
+                in_group_rules = False
+            group_agents.append(value.lower())
+            continue
+        in_group_rules = True
+        if directive != 'crawl-delay':
+            continue
+        tokens = value.split()
+        try:
+            if len(tokens) == 2:
+                delays[tokens[0].lower()] = float(tokens[1])
+            elif len(tokens) == 1:
+                for agent in group_agents or ['*']:
+                    delays[agent] = float(tokens[0])
+        except ValueError:
+            continue
+    return delays.get(user_agent.lower(), delays.get('*'))
+
 def check_robots_summary(site_url, ignore_ssl):
     """Отдельная функция для проверки robots.txt с выводом что хорошо и что плохо."""
     seo_files = check_seo_files(site_url, ignore_ssl)
@@ -569,16 +1497,62 @@ def check_robots_summary(site_url, ignore_ssl):
     
     return summary
 
+TRACKING_QUERY_PARAMS = {'gclid', 'fbclid', 'yclid', 'ysclid', 'dclid', 'msclkid', '_openstat', 'mc_cid', 'mc_eid', '_ga', '_gl'}
+
+@lru_cache(maxsize=200000)
+def normalize_url(url, strip_trailing_slash=True):
+    """Приводит URL к каноническому виду для сравнения и дедупликации.
+
+    Схема и хост переводятся в нижний регистр, порт по умолчанию (80/443)
+    убирается, фрагмент и трекинговые параметры (utm_*, gclid, yclid и т. п.)
+    удаляются, остальные параметры сортируются. Путь регистр сохраняет,
+    вместе с параметрами сегмента (;jsessionid=...). Завершающий слеш убирается у всех путей, кроме корня, если не задано
+    strip_trailing_slash=False. Относительные и не-HTTP ссылки возвращаются как есть.
+    Результат кэшируется, поэтому функцию можно вызывать для каждой ссылки.
+    """
+    if not url:
+        return url
+    try:
+        # urlsplit, а не urlparse: тот отделяет ;params и путь терял бы их
+        parsed = urlsplit(url.strip())
+        port = parsed.port
+    except ValueError:
+        return url
+    scheme = parsed.scheme.lower()
+    if scheme not in ('http', 'https') or not parsed.netloc:
+        return url
+    host = (parsed.hostname or '').rstrip('.')
+    if ':' in host:
+        # hostname отдает IPv6-адрес без скобок, в URL они обязательны
+        host = f"[{host}]"
+    if port == (80 if scheme == 'http' else 443):
+        port = None
+    netloc = f"{host}:{port}" if port else host
+    if parsed.username:
+        netloc = f"{parsed.username}{':' + parsed.password if parsed.password else ''}@{netloc}"
+    path = parsed.path or '/'
+    if strip_trailing_slash and path != '/':
+        path = path.rstrip('/') or '/'
+    query = '&'.join(sorted(
+        part for part in parsed.query.split('&')
+        if part and not (part.split('=', 1)[0].lower().startswith('utm_') or part.split('=', 1)[0].lower() in TRACKING_QUERY_PARAMS)
+    ))
+    normalized = f"{scheme}://{netloc}{path}"
+    if query:
+        normalized += f"?{query}"
+    return normalized
+
 def get_site_pages(site_url, ignore_ssl, max_pages=15000):
     """Получает список всех страниц на сайте."""
     site_pages = set()
     
     try:
         # Нормализуем базовый URL
-        base_url = site_url.rstrip('/')
+        base_url = normalize_url(site_url)
+        domain = urlparse(base_url).netloc
         
         # Получаем главную страницу
-        response = requests.get(site_url, verify=not ignore_ssl, timeout=10)
+        response = http_get(site_url, verify=not ignore_ssl, timeout=10)
         if response.status_code == 200:
             soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -587,30 +1561,10 @@ def get_site_pages(site_url, ignore_ssl, max_pages=15000):
                 href = link['href'].strip()
                 if not href:
                     continue
-                    
-                # Нормализуем URL
-                if href.startswith('/'):
-                    # Относительная ссылка
-                    full_url = base_url + href
-                elif href.startswith(base_url):
-                    # Абсолютная ссылка на том же домене
-                    full_url = href
-                elif href.startswith('http') and base_url in href:
-                    # Ссылка на тот же домен
-                    full_url = href
-                else:
-                    # Пропускаем внешние ссылки
-                    continue
-                
-                # Нормализуем URL (убираем дублирующиеся слеши и фрагменты)
-                full_url = full_url.rstrip('/')
-                if '#' in full_url:
-                    full_url = full_url.split('#')[0]
-                if '?' in full_url:
-                    full_url = full_url.split('?')[0]
                 
-                # Добавляем только если это валидный URL
-                if full_url.startswith('http'):
+                # Приводим ссылку к каноническому виду и пропускаем внешние
+                full_url = normalize_url(urljoin(site_url, href))
+                if full_url.startswith('http') and urlparse(full_url).netloc == domain:
                     site_pages.add(full_url)
             
             # Добавляем главную страницу
@@ -622,8 +1576,304 @@ def get_site_pages(site_url, ignore_ssl, max_pages=15000):
     # Возвращаем отсортированный список
     return sorted(list(site_pages))[:max_pages]
 
-def validate_sitemap(sitemap_content, site_url, ignore_ssl):
-    """Валидирует sitemap.xml с поддержкой sitemap index и более подробной проверкой."""
+def find_site_crawl(site_url, db_path=CRAWL_STATE_DB, max_age=COVERAGE_CRAWL_MAX_AGE):
+    """Последний обход парсера для хоста site_url (CrawlResults) или None.
+
+    Завершенный обход предпочтительнее; незавершенный тоже подходит — в нем
+    реальные страницы сайта, просто не все. Обходы, которые не обновлялись
+    дольше max_age секунд, пропускаются (None — без ограничения); время
+    обхода (UTC) доступно в updated_at результата.
+    """
+    if not os.path.exists(db_path):
+        return None
+    host = urlparse(normalize_url(site_url)).netloc
+    query = "SELECT start_url, updated_at FROM crawl_runs"
+    params = ()
+    if max_age is not None:
+        query += " WHERE updated_at >= datetime('now', ?)"
+        params = (f"-{int(max_age)} seconds",)
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(query + " ORDER BY finished DESC, updated_at DESC", params).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    for start_url, updated_at in rows:
+        if urlparse(start_url).netloc == host:
+            results = CrawlResults(start_url, db_path, updated_at=updated_at)
+            if results:
+                return results
+    return None
+
+def iter_crawled_pages(results):
+    """URL индексируемых страниц из результатов обхода: HTML, 200 без редиректа, без noindex."""
+    for row in results:
+        if row.get('HTTP') == 200 and not row.get('Редирект') and row.get('SEO') != '➖ Не HTML' \
+                and 'noindex' not in str(row.get('Meta_Robots', '')).lower():
+            yield row['Ссылка']
+
+def get_coverage_site_pages(site_url, ignore_ssl):
+    """Страницы сайта для сравнения с sitemap: (страницы, источник, время обхода UTC).
+
+    Берутся из последнего не устаревшего обхода парсера (find_site_crawl,
+    источник 'crawl'), а без него — из ссылок главной страницы (get_site_pages,
+    источник 'homepage', время None).
+    """
+    crawl = find_site_crawl(site_url)
+    if crawl is not None:
+        return iter_crawled_pages(crawl), 'crawl', crawl.updated_at
+    return get_site_pages(site_url, ignore_ssl), 'homepage', None
+
+class SitemapCoverage:
+    """Сравнение URL sitemap и страниц сайта через хэш-индексы.
+
+    Индексы — словари {normalize_url(url): url} для sitemap и для сайта,
+    строятся один раз, поэтому каждая разность считается за линейное время.
+    Разности отдаются генераторами в порядке исходных URL и могут сразу
+    записываться в отчет.
+    """
+
+    def __init__(self, sitemap_urls, site_urls, broken_urls=()):
+        self.sitemap_index = self._index(sitemap_urls)
+        self.site_index = self._index(site_urls)
+        self.broken = {normalize_url(url) for url in broken_urls if url}
+
+    @staticmethod
+    def _index(urls):
+        index = {}
+        for url in urls:
+            if url:
+                index.setdefault(normalize_url(url), url)
+        return index
+
+    def site_only(self):
+        """Страницы сайта, которых нет в sitemap."""
+        for key, url in self.site_index.items():
+            if key not in self.sitemap_index:
+                yield url
+
+    def sitemap_only(self, broken_only=False):
+        """URL sitemap, которых нет среди страниц сайта; broken_only — только недоступные."""
+        for key, url in self.sitemap_index.items():
+            if key not in self.site_index and (not broken_only or key in self.broken):
+                yield url
+
+def _iter_sitemap_chunks(source):
+    """Куски XML sitemap в байтах; gzip (sitemap.xml.gz) распаковывается прозрачно.
+
+    source — текст или байты sitemap либо итератор кусков байтов (например,
+    response.iter_content). Сжатие определяется по сигнатуре gzip, а не по
+    расширению, так как серверы отдают .xml.gz и с Content-Encoding, и как
+    обычный файл.
+    """
+    if isinstance(source, str):
+        yield source.encode('utf-8')
+        return
+    if isinstance(source, (bytes, bytearray)):
+        source = [bytes(source)]
+    decompressor = None
+    head = b''
+    for chunk in source:
+        if not chunk:
+            continue
+        if decompressor is None:
+            head += chunk
+            if len(head) < 2:
+                continue
+            chunk, head = head, b''
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if chunk[:2] == b'\x1f\x8b' else False
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+        if chunk:
+            yield chunk
+    if head:
+        yield head
+
+def iter_sitemap(source):
+    """Потоково разбирает sitemap и выдает записи по одной.
+
+    Первой выдается ('root', имя корневого тега без пространства имен), затем
+    ('url', {'loc', 'lastmod', 'priority', 'changefreq'}) для urlset и
+    ('sitemap', {'loc', 'lastmod'}) для sitemap index. Разобранные элементы
+    сразу удаляются из дерева, поэтому память не растет с размером файла.
+    Битый XML приводит к ET.ParseError.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+
+    def records():
+        nonlocal root
+        for event, elem in parser.read_events():
+            if root is None:
+                root = elem
+                yield 'root', elem.tag.rsplit('}', 1)[-1]
+                continue
+            if event != 'end':
+                continue
+            if elem.tag == SITEMAP_NS + 'url':
+                yield 'url', {
+                    'loc': (elem.findtext(SITEMAP_NS + 'loc') or '').strip() or None,
+                    'lastmod': (elem.findtext(SITEMAP_NS + 'lastmod') or '').strip() or '-',
+                    'priority': (elem.findtext(SITEMAP_NS + 'priority') or '').strip() or '-',
+                    'changefreq': (elem.findtext(SITEMAP_NS + 'changefreq') or '').strip() or '-',
+                }
+                root.clear()
+            elif elem.tag == SITEMAP_NS + 'sitemap':
+                yield 'sitemap', {
+                    'loc': (elem.findtext(SITEMAP_NS + 'loc') or '').strip() or None,
+                    'lastmod': (elem.findtext(SITEMAP_NS + 'lastmod') or '').strip() or '-',
+                }
+                root.clear()
+
+    for chunk in _iter_sitemap_chunks(source):
+        parser.feed(chunk)
+        yield from records()
+    parser.close()
+    yield from records()
+
+class SitemapLimits:
+    """Общий на весь обход лимит URL и загруженных байт sitemap.
+
+    Счетчики увеличиваются из потоков загрузки; после превышения любого
+    лимита exceeded становится True, и обход перестает загружать и
+    выдавать новые записи.
+    """
+
+    def __init__(self, max_urls=SITEMAP_MAX_TOTAL_URLS, max_bytes=SITEMAP_MAX_TOTAL_BYTES):
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.urls = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def exceeded(self):
+        return self.urls >= self.max_urls or self.bytes >= self.max_bytes
+
+    def add_bytes(self, count):
+        with self._lock:
+            self.bytes += count
+            return self.bytes < self.max_bytes
+
+    def add_url(self):
+        with self._lock:
+            if self.urls >= self.max_urls:
+                return False
+            self.urls += 1
+            return True
+
+    def describe(self):
+        return f"{self.urls} URL, {self.bytes // 1024} КБ (лимит {self.max_urls} URL, {self.max_bytes // (1024 * 1024)} МБ)"
+
+def _fetch_sitemap(sitemap_url, ignore_ssl, limits):
+    """Загружает и потоково разбирает один sitemap.
+
+    Возвращает (записи URL, вложенные sitemap, ошибки); записи —
+    (url, metadata, sitemap_url). Чтение прерывается при превышении limits.
+    """
+    entries, sub_sitemaps, errors = [], [], []
+    if limits.exceeded:
+        return entries, sub_sitemaps, errors
+
+    def chunks(response):
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            if not limits.add_bytes(len(chunk)):
+                return
+            yield chunk
+
+    try:
+        with contextlib.closing(http_get(sitemap_url, timeout=SITEMAP_FETCH_TIMEOUT, verify=not ignore_ssl, stream=True)) as response:
+            if response.status_code != 200:
+                errors.append(f"Не удалось загрузить sitemap: {sitemap_url} (статус: {response.status_code})")
+                return entries, sub_sitemaps, errors
+            for kind, record in iter_sitemap(chunks(response)):
+                if kind == 'root':
+                    if record not in ('sitemapindex', 'urlset'):
+                        errors.append(f"Неизвестный формат sitemap: {sitemap_url}")
+                        break
+                elif kind == 'sitemap':
+                    if record['loc']:
+                        sub_sitemaps.append(record['loc'])
+                elif record['loc']:
+                    if not limits.add_url():
+                        break
+                    entries.append((record['loc'], {
+                        'lastmod': record['lastmod'],
+                        'priority': record['priority'],
+                        'changefreq': record['changefreq']
+                    }, sitemap_url))
+    except ET.ParseError as e:
+        # Обрезанный по лимиту файл — не ошибка разметки
+        if not limits.exceeded:
+            errors.append(f"Ошибка парсинга XML в {sitemap_url}: {str(e)}")
+    except Exception as e:
+        errors.append(f"Ошибка обработки {sitemap_url}: {str(e)}")
+    return entries, sub_sitemaps, errors
+
+def iter_sitemap_urls(sitemap_url, ignore_ssl, errors, visited_sitemaps=None, max_depth=3, limits=None, max_workers=SITEMAP_FETCH_WORKERS):
+    """Обходит sitemap по URL (с вложенными sitemap index) и выдает (url, metadata, source_sitemap).
+
+    sitemap_url — URL или список URL первого уровня. Sitemap одного уровня
+    загружаются параллельно (каждый читается потоково), записи выдаются в
+    порядке следования sitemap. visited_sitemaps общий для всего обхода,
+    поэтому общие для нескольких index файлы загружаются один раз, а циклы
+    обрываются; пропущенные повторы пишутся в лог как предупреждения. Ошибки дописываются в errors, остальные sitemap при этом
+    обрабатываются дальше; при превышении limits обход останавливается.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if visited_sitemaps is None:
+        visited_sitemaps = set()
+    if limits is None:
+        limits = SitemapLimits()
+
+    level = [sitemap_url] if isinstance(sitemap_url, str) else list(sitemap_url)
+    depth = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while level:
+            batch = []
+            for url in level:
+                if url in visited_sitemaps:
+                    # Цикл в sitemap index или sitemap, на который ссылаются несколько index
+                    logger.warning(f"Sitemap {url} уже обработан в этом обходе, пропускаем")
+                    log_to_file(f"⚠️ Sitemap {url} уже обработан в этом обходе, пропускаем")
+                else:
+                    visited_sitemaps.add(url)
+                    batch.append(url)
+            if depth >= max_depth:
+                for url in batch:
+                    errors.append(f"Достигнута максимальная глубина вложенности sitemap: {url}")
+                return
+            futures = [executor.submit(_fetch_sitemap, url, ignore_ssl, limits) for url in batch]
+            level = []
+            for future in futures:
+                # После превышения лимита оставшиеся загрузки завершаются сразу,
+                # а уже учтенные ими записи выдаются
+                entries, sub_sitemaps, fetch_errors = future.result()
+                errors.extend(fetch_errors)
+                yield from entries
+                level.extend(sub_sitemaps)
+            if limits.exceeded:
+                errors.append(f"Обход sitemap остановлен по лимиту: {limits.describe()}")
+                return
+            depth += 1
+
+def validate_sitemap(sitemap_content, site_url, ignore_ssl, progress_callback=None, stop_event=None, export_data=None, previous_snapshot=None, extra_sitemaps=(), sitemap_url=None):
+    """Валидирует sitemap.xml с поддержкой sitemap index и более подробной проверкой.
+
+    sitemap_content — байты sitemap (gzip распаковывается), загруженного по
+    sitemap_url; extra_sitemaps — остальные sitemap из robots.txt, их URL
+    добавляются к проверке. Все обходы используют одно множество посещенных
+    sitemap и один SitemapLimits, поэтому sitemap из index и robots.txt
+    загружается один раз, а лимиты действуют на весь аудит, включая
+    основной sitemap. URL проверяются параллельно (check_sitemap_urls), progress_callback
+    (готово, всего) сообщает о ходе проверки. Если передан export_data,
+    в него сразу после разбора кладутся urls, page_details и sitemap_info,
+    и статусы появляются там по мере проверки. С previous_snapshot заново
+    проверяются только новые, измененные, недоступные и устаревшие URL.
+    """
     errors = []
     positives = []
     recommendations = []
@@ -632,109 +1882,95 @@ def validate_sitemap(sitemap_content, site_url, ignore_ssl):
     sitemap_info = {}  # Информация о структуре sitemap
     pages_not_in_sitemap = []  # Страницы на сайте, но не в sitemap
     pages_in_sitemap_not_on_site = []  # Страницы в sitemap, но не на сайте
+    visited_sitemaps = {sitemap_url} if sitemap_url else set()
+    limits = SitemapLimits()
+    limits.add_bytes(len(sitemap_content or b''))
     
     try:
-        root = ET.fromstring(sitemap_content)
-        
+        # Записи читаются потоково; статусы проверяются после разбора, чтобы
+        # не держать открытыми соединения с sitemap во время проверок
+        records = iter_sitemap(sitemap_content)
+        root_tag = next(records, ('root', None))[1]
+
         # Проверяем тип sitemap
-        if 'sitemapindex' in root.tag:
+        if root_tag == 'sitemapindex':
             # Это sitemap index
             positives.append("Обнаружен sitemap index (иерархическая структура)")
-            sitemap_elems = list(root.iter('{http://www.sitemaps.org/schemas/sitemap/0.9}sitemap'))
-            sitemap_urls = [sitemap_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}loc') for sitemap_elem in sitemap_elems]
+            sitemap_urls = [record['loc'] for kind, record in records if kind == 'sitemap']
             sitemap_info['type'] = 'sitemapindex'
             sitemap_info['sub_sitemaps'] = sitemap_urls
             positives.append(f"Найдено {len(sitemap_urls)} подчиненных sitemap")
             
-            # Рекурсивно обрабатываем все подчиненные sitemap
-            all_urls = []
-            all_sources = {}
-            all_metadata = {}
-            all_errors = []
-            
-            for sub_sitemap_url in sitemap_urls:
-                if sub_sitemap_url:
-                    sub_result = process_sitemap_recursively(sub_sitemap_url, ignore_ssl)
-                    all_urls.extend(sub_result['urls'])
-                    all_sources.update(sub_result['sources'])
-                    all_metadata.update(sub_result['metadata'])
-                    all_errors.extend(sub_result['errors'])
+            # Рекурсивно обрабатываем все подчиненные sitemap (параллельно)
+            for url, url_metadata, source in iter_sitemap_urls([u for u in sitemap_urls if u], ignore_ssl, errors, visited_sitemaps, limits=limits):
+                urls_in_sitemap.append(url)
+                page_details.append({
+                    'url': url,
+                    'status': 'не ОК',
+                    'lastmod': url_metadata['lastmod'],
+                    'priority': url_metadata['priority'],
+                    'changefreq': url_metadata['changefreq'],
+                    'source_sitemap': source
+                })
             
-            urls_in_sitemap = all_urls
-            errors.extend(all_errors)
+            if urls_in_sitemap:
+                positives.append(f"Всего найдено {len(urls_in_sitemap)} URL во всех sitemap")
             
-            if all_urls:
-                positives.append(f"Всего найдено {len(all_urls)} URL во всех sitemap")
-                
-                # Обрабатываем все URL и проверяем доступность для всех
-                for i, url in enumerate(all_urls):
-                    # Получаем метаданные для URL
-                    url_metadata = all_metadata.get(url, {})
-                    lastmod = url_metadata.get('lastmod', '-')
-                    priority = url_metadata.get('priority', '-')
-                    changefreq = url_metadata.get('changefreq', '-')
-                    
-                    # Проверяем доступность для всех URL
-                    status = 'не ОК'
-                    if url and url.startswith('http'):
-                        _, http_status, _, _ = check_resource(url, ignore_ssl)
-                        if isinstance(http_status, int) and http_status == 200:
-                            status = 'ОК'
-                        else:
-                            status = f'не ОК ({http_status})'
-                    
-                    page_details.append({
-                        'url': url,
-                        'status': status,
-                        'lastmod': lastmod,
-                        'priority': priority,
-                        'changefreq': changefreq,
-                        'source_sitemap': all_sources.get(url, 'неизвестно')
-                    })
-            
-        elif 'urlset' in root.tag:
+        elif root_tag == 'urlset':
             # Это обычный sitemap
             positives.append("Корневой элемент верный (обычный sitemap)")
             sitemap_info['type'] = 'urlset'
-            url_elems = list(root.iter('{http://www.sitemaps.org/schemas/sitemap/0.9}url'))
-            urls = [url_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}loc') for url_elem in url_elems]
-            urls_in_sitemap = urls
-            positives.append(f"Найдено {len(urls)} URL в sitemap")
+            for kind, record in records:
+                if kind != 'url':
+                    continue
+                if limits.exceeded or not limits.add_url():
+                    errors.append(f"Обход sitemap остановлен по лимиту: {limits.describe()}")
+                    break
+                url = record['loc']
+                urls_in_sitemap.append(url)
+                page_details.append({
+                    'url': url,
+                    'status': 'не ОК',
+                    'lastmod': record['lastmod'],
+                    'priority': record['priority'],
+                    'changefreq': record['changefreq'],
+                    'source_sitemap': 'основной sitemap'
+                })
+            positives.append(f"Найдено {len(urls_in_sitemap)} URL в sitemap")
             
-            if len(urls) > 50000:
+            if len(urls_in_sitemap) > SITEMAP_MAX_URLS:
                 errors.append("Sitemap содержит более 50,000 URL")
                 recommendations.append("Разделите sitemap на несколько файлов.")
             
-            if not all(url and url.startswith('http') for url in urls if url):
+            if not all(url and url.startswith('http') for url in urls_in_sitemap if url):
                 errors.append("Некоторые URL в sitemap недействительны или относительные")
                 recommendations.append("Используйте абсолютные URL в sitemap.")
-            
-            # Проверка доступности URL в sitemap и сбор подробностей
-            for url_elem in url_elems:
-                url = url_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                lastmod = url_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}lastmod') or '-'
-                priority = url_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}priority') or '-'
-                changefreq = url_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}changefreq') or '-'
-                status = 'не ОК'
-                http_status = None
-                if url and url.startswith('http'):
-                    _, http_status, _, _ = check_resource(url, ignore_ssl)
-                    if isinstance(http_status, int) and http_status == 200:
-                        status = 'ОК'
-                    else:
-                        status = f'не ОК ({http_status})'
-                page_details.append({
-                    'url': url,
-                    'status': status,
-                    'lastmod': lastmod,
-                    'priority': priority,
-                    'changefreq': changefreq,
-                    'source_sitemap': 'основной sitemap'
-                })
         else:
             errors.append("Неверный корневой элемент sitemap.xml (ожидается urlset или sitemapindex)")
             recommendations.append("Убедитесь, что sitemap соответствует схеме http://www.sitemaps.org/schemas/sitemap/0.9")
         
+        # Остальные sitemap, указанные в robots.txt
+        if extra_sitemaps and not limits.exceeded:
+            sitemap_info['extra_sitemaps'] = list(extra_sitemaps)
+            extra_count = len(urls_in_sitemap)
+            for url, url_metadata, source in iter_sitemap_urls(list(extra_sitemaps), ignore_ssl, errors, visited_sitemaps, limits=limits):
+                urls_in_sitemap.append(url)
+                page_details.append({
+                    'url': url,
+                    'status': 'не ОК',
+                    'lastmod': url_metadata['lastmod'],
+                    'priority': url_metadata['priority'],
+                    'changefreq': url_metadata['changefreq'],
+                    'source_sitemap': source
+                })
+            positives.append(f"Из {len(extra_sitemaps)} дополнительных sitemap в robots.txt получено {len(urls_in_sitemap) - extra_count} URL")
+        
+        if export_data is not None:
+            export_data.update({'urls': urls_in_sitemap, 'page_details': page_details, 'sitemap_info': sitemap_info})
+
+        # Проверка доступности URL в sitemap
+        sitemap_info['rechecked'] = check_sitemap_urls(page_details, ignore_ssl, progress_callback, stop_event, previous_snapshot)
+        
         # Если есть не ОК, добавить в errors
         broken_urls = [d['url'] for d in page_details if d['status'] != 'ОК']
         if broken_urls:
@@ -746,29 +1982,24 @@ def validate_sitemap(sitemap_content, site_url, ignore_ssl):
         
         # Анализируем страницы на сайте vs sitemap
         try:
-            site_pages = get_site_pages(site_url, ignore_ssl)
-            
-            # Нормализуем URL для корректного сравнения
-            def normalize_url(url):
-                """Нормализует URL для сравнения"""
-                if not url:
-                    return url
-                url = url.rstrip('/')
-                if '#' in url:
-                    url = url.split('#')[0]
-                if '?' in url:
-                    url = url.split('?')[0]
-                return url
-            
-            # Нормализуем все URL
-            normalized_site_pages = set(normalize_url(url) for url in site_pages)
-            normalized_sitemap_urls = set(normalize_url(url) for url in urls_in_sitemap)
+            # Страницы сайта — из обхода парсера, если он есть, иначе со ссылок главной
+            site_pages, site_pages_source, crawled_at = get_coverage_site_pages(site_url, ignore_ssl)
+            coverage = SitemapCoverage(urls_in_sitemap, site_pages, broken_urls)
+            sitemap_info['site_pages_source'] = site_pages_source
+            sitemap_info['site_pages_crawled_at'] = crawled_at
+            if site_pages_source == 'crawl':
+                positives.append(f"Покрытие сравнивается с обходом сайта парсером от {crawled_at} UTC ({len(coverage.site_index)} страниц)")
+            elif find_site_crawl(site_url, max_age=None) is not None:
+                recommendations.append(f"Обход сайта парсером старше {COVERAGE_CRAWL_MAX_AGE // 86400} дней и не используется: "
+                                       "запустите парсер заново для точного сравнения с sitemap.")
+            if export_data is not None:
+                export_data['coverage'] = coverage
             
             # Страницы на сайте, но не в sitemap
-            pages_not_in_sitemap = [url for url in site_pages if normalize_url(url) not in normalized_sitemap_urls]
+            pages_not_in_sitemap = list(coverage.site_only())
             
             # Страницы в sitemap, но не на сайте (недоступные)
-            pages_in_sitemap_not_on_site = [url for url in urls_in_sitemap if normalize_url(url) not in normalized_site_pages and url in broken_urls]
+            pages_in_sitemap_not_on_site = list(coverage.sitemap_only(broken_only=True))
             
             if pages_not_in_sitemap:
                 errors.append(f"Страницы на сайте не в sitemap ({len(pages_not_in_sitemap)} URL):")
@@ -796,19 +2027,44 @@ def validate_sitemap(sitemap_content, site_url, ignore_ssl):
     
     return errors, positives, recommendations, urls_in_sitemap, page_details, sitemap_info, pages_not_in_sitemap, pages_in_sitemap_not_on_site
 
-def check_sitemap_summary(site_url, ignore_ssl):
+def check_sitemap_summary(site_url, ignore_ssl, progress_callback=None, stop_event=None):
     """Отдельная функция для проверки sitemap.xml с выводом что хорошо и что плохо и подробностями по страницам."""
-    seo_files = check_seo_files(site_url, ignore_ssl)
-    sitemap_status = next((status for file, status, content in seo_files if file == "sitemap.xml"), False)
-    sitemap_content = next((content for file, status, content in seo_files if file == "sitemap.xml"), "")
-    
-    if not sitemap_status:
-        return "❌ sitemap.xml не найден или недоступен\n📝 Рекомендация: Создайте sitemap.xml."
-    
-    errors, positives, recommendations, urls_in_sitemap, page_details, sitemap_info, pages_not_in_sitemap, pages_in_sitemap_not_on_site = validate_sitemap(sitemap_content, site_url, ignore_ssl)
+    with ensure_audit_cache():
+        return format_sitemap_summary(validate_site_sitemap(site_url, ignore_ssl, progress_callback, stop_event))
+
+def validate_site_sitemap(site_url, ignore_ssl, progress_callback=None, stop_event=None, sitemap_content=None):
+    """Проверяет sitemap сайта с учетом прошлого снимка и заполняет sitemap_export_data.
+
+    Загружает sitemap, если sitemap_content не передан, проверяет его через
+    validate_sitemap с прошлым снимком из sitemap_snapshots и сохраняет
+    новый снимок. Возвращает sitemap_export_data или None, если sitemap
+    недоступен.
+    """
+    global sitemap_export_data
+    if sitemap_content is None:
+        seo_files = check_seo_files(site_url, ignore_ssl)
+        sitemap_status = next((status for file, status, content in seo_files if file == "sitemap.xml"), False)
+        sitemap_content = next((content for file, status, content in seo_files if file == "sitemap.xml"), b"")
+        if not sitemap_status:
+            return None
+    sitemap_urls = get_site_sitemap_urls(site_url, ignore_ssl)
+    
+    # Прошлый снимок: заново проверяются только новые, измененные и недоступные URL
+    previous_snapshot = sitemap_snapshots.load(site_url)
+
+    # Экспорт видит URL и статусы уже во время проверки
+    sitemap_export_data = live_export_data = {}
+    errors, positives, recommendations, urls_in_sitemap, page_details, sitemap_info, pages_not_in_sitemap, pages_in_sitemap_not_on_site = validate_sitemap(
+        sitemap_content, site_url, ignore_ssl, progress_callback, stop_event, export_data=sitemap_export_data,
+        previous_snapshot=previous_snapshot, extra_sitemaps=sitemap_urls[1:], sitemap_url=sitemap_urls[0])
+
+    snapshot_diff = None
+    if page_details and not (stop_event and stop_event.is_set()):
+        if previous_snapshot:
+            snapshot_diff = sitemap_snapshots.diff(previous_snapshot, page_details)
+        sitemap_snapshots.save(site_url, page_details)
     
     # Сохраняем полные данные для экспорта
-    global sitemap_export_data
     sitemap_export_data = {
         'urls': urls_in_sitemap,
         'page_details': page_details,
@@ -817,11 +2073,37 @@ def check_sitemap_summary(site_url, ignore_ssl):
         'positives': positives,
         'recommendations': recommendations,
         'pages_not_in_sitemap': pages_not_in_sitemap,
-        'pages_in_sitemap_not_on_site': pages_in_sitemap_not_on_site
+        'pages_in_sitemap_not_on_site': pages_in_sitemap_not_on_site,
+        'snapshot_diff': snapshot_diff,
+        'snapshot_checked_at': max((d['checked_at'] for d in previous_snapshot.values()), default=None),
+        'coverage': live_export_data.get('coverage')
     }
+    return sitemap_export_data
+
+def format_sitemap_summary(data):
+    """Текстовая сводка по результату validate_site_sitemap."""
+    if data is None:
+        return "❌ sitemap.xml не найден или недоступен\n📝 Рекомендация: Создайте sitemap.xml."
+    errors, positives, recommendations = data['errors'], data['positives'], data['recommendations']
+    page_details, sitemap_info, snapshot_diff = data['page_details'], data['sitemap_info'], data['snapshot_diff']
     
     summary = "### Проверка sitemap.xml\n\n"
     
+    if snapshot_diff is not None:
+        summary += f"**🔄 Изменения с прошлой проверки ({datetime.fromtimestamp(data['snapshot_checked_at']).strftime('%Y-%m-%d %H:%M')}):** "
+        summary += f"добавлено {len(snapshot_diff['added'])}, удалено {len(snapshot_diff['removed'])}, изменено {len(snapshot_diff['changed'])}; "
+        summary += f"перепроверено {sitemap_info.get('rechecked', 0)} из {len(page_details)} URL\n"
+        for title, urls in (("Добавлены", snapshot_diff['added']), ("Удалены", snapshot_diff['removed'])):
+            for url in urls[:10]:
+                summary += f"{title}: {url}\n"
+            if len(urls) > 10:
+                summary += f"{title}: ... и еще {len(urls) - 10} URL\n"
+        for url, change in snapshot_diff['changed'][:10]:
+            summary += f"Изменен: {url} ({change})\n"
+        if len(snapshot_diff['changed']) > 10:
+            summary += f"Изменены: ... и еще {len(snapshot_diff['changed']) - 10} URL\n"
+        summary += "\n"
+    
     # Добавляем информацию о типе sitemap
     if sitemap_info.get('type') == 'sitemapindex':
         summary += "**🔗 Тип sitemap:** Sitemap Index (иерархическая структура)\n\n"
@@ -1170,6 +2452,66 @@ def analyze_keywords(driver, site_url, target_keywords):
     except Exception as e:
         return [], {}, f"Ошибка анализа ключевых слов: {str(e)}"
 
+# Снимок DOM за один вызов execute_script: все, что нужно проверкам страницы.
+# __seoSnapshotId сбрасывается при каждой навигации, по нему проверяется актуальность снимка.
+DOM_SNAPSHOT_SCRIPT = """
+    if (!window.__seoSnapshotId) {
+        window.__seoSnapshotId = Date.now() + '-' + Math.random();
+    }
+    const attr = (el, name) => el.getAttribute(name);
+    // Абсолютный URL из href/src; у SVG-элементов это SVGAnimatedString, а не строка,
+    // поэтому берем атрибут (href или xlink:href) и разрешаем относительно baseURI
+    const absUrl = (el, name) => {
+        const value = el[name];
+        if (typeof value === 'string') return value || null;
+        const raw = attr(el, name) || attr(el, 'xlink:' + name);
+        if (!raw) return null;
+        try { return new URL(raw, document.baseURI).href; } catch (e) { return null; }
+    };
+    return {
+        id: window.__seoSnapshotId,
+        url: location.href,
+        title: document.title,
+        anchors: Array.from(document.getElementsByTagName('a'), a => ({href: absUrl(a, 'href'), rel: attr(a, 'rel') || ''})),
+        images: Array.from(document.images, img => ({src: absUrl(img, 'src'), alt: attr(img, 'alt'), title: attr(img, 'title')})),
+        meta: Array.from(document.getElementsByTagName('meta'), m => ({name: attr(m, 'name'), property: attr(m, 'property'), content: attr(m, 'content')})),
+        links: Array.from(document.querySelectorAll('link[rel]'), l => ({rel: attr(l, 'rel'), href: absUrl(l, 'href') || attr(l, 'href')})),
+        headings: Array.from(document.querySelectorAll('h1, h2, h3, h4, h5, h6'), h => ({tag: h.tagName.toLowerCase(), text: h.textContent.trim()})),
+        itemscopes: Array.from(document.querySelectorAll('[itemscope]'), el => ({itemtype: attr(el, 'itemtype')})),
+        iframes: Array.from(document.getElementsByTagName('iframe'), f => attr(f, 'src') || ''),
+        scripts: Array.from(document.scripts, sc => attr(sc, 'src') || ''),
+        noindex_tags: document.getElementsByTagName('noindex').length
+    };
+"""
+
+def get_dom_snapshot(driver, refresh=False):
+    """Возвращает снимок DOM текущей страницы (словарь из DOM_SNAPSHOT_SCRIPT).
+
+    Снимок кэшируется на драйвере до следующей навигации; refresh=True
+    снимает DOM заново (например, после догрузки динамического контента).
+    """
+    cached = getattr(driver, '_seo_dom_snapshot', None)
+    if cached and not refresh:
+        try:
+            if driver.execute_script("return window.__seoSnapshotId || null") == cached['id']:
+                return cached
+        except Exception:
+            pass
+    snapshot = driver.execute_script(DOM_SNAPSHOT_SCRIPT)
+    driver._seo_dom_snapshot = snapshot
+    return snapshot
+
+def find_meta(snapshot, name):
+    """Первый meta с атрибутом name (без учета регистра) или None."""
+    for meta in snapshot['meta']:
+        if (meta['name'] or '').lower() == name:
+            return meta
+    return None
+
+def find_link_rel(snapshot, rel):
+    """Все <link> с указанным rel."""
+    return [link for link in snapshot['links'] if (link['rel'] or '').strip().lower() == rel]
+
 def check_open_graph(driver):
     """Проверяет теги Open Graph."""
     og_tags = {
@@ -1179,44 +2521,44 @@ def check_open_graph(driver):
         "og:url": "Не найден",
         "og:type": "Не найден"
     }
-    for meta in driver.find_elements(By.TAG_NAME, "meta"):
-        property_attr = meta.get_attribute("property")
+    for meta in get_dom_snapshot(driver)['meta']:
+        property_attr = meta['property']
         if property_attr and property_attr.startswith("og:"):
-            content = meta.get_attribute("content") or "Без содержимого"
+            content = meta['content'] or "Без содержимого"
             og_tags[property_attr] = content
     return og_tags
 
 def check_schema_markup(driver):
     """Проверяет наличие микроразметки Schema.org."""
-    schema_tags = driver.find_elements(By.XPATH, "//*[@itemscope]")
+    schema_tags = get_dom_snapshot(driver)['itemscopes']
     if not schema_tags:
         return False, "Микроразметка Schema.org не найдена"
     valid_types = ["Article", "Product", "Organization", "Person", "WebPage"]
     for tag in schema_tags:
-        itemtype = tag.get_attribute("itemtype")
+        itemtype = tag['itemtype']
         if itemtype and any(valid_type in itemtype for valid_type in valid_types):
             return True, f"Найдена микроразметка: {itemtype}"
     return False, "Микроразметка присутствует, но не соответствует ожидаемым типам"
 
 def check_noindex_nofollow_noarchive(driver):
     """Проверяет наличие meta тегов noindex, nofollow, noarchive и тега <noindex>."""
+    snapshot = get_dom_snapshot(driver)
     # Проверка meta robots
-    meta_robots = driver.find_elements(By.XPATH, "//meta[@name='robots']")
+    meta_robots = find_meta(snapshot, 'robots')
     noindex_meta = False
     nofollow_meta = False
     noarchive_meta = False
     robots_content = "Не найден"
     
     if meta_robots:
-        content = meta_robots[0].get_attribute("content").lower()
+        content = (meta_robots['content'] or '').lower()
         noindex_meta = "noindex" in content
         nofollow_meta = "nofollow" in content
         noarchive_meta = "noarchive" in content
         robots_content = content
     
     # Проверка тега <noindex>
-    noindex_tag = driver.find_elements(By.XPATH, "//noindex")
-    has_noindex_tag = len(noindex_tag) > 0
+    has_noindex_tag = snapshot['noindex_tags'] > 0
     
     return noindex_meta, nofollow_meta, noarchive_meta, has_noindex_tag, robots_content
 
@@ -1236,31 +2578,25 @@ def check_hidden_blocks(driver):
 
 def check_canonical(driver):
     """Проверяет canonical тег."""
-    canonical = driver.find_elements(By.XPATH, "//link[@rel='canonical']")
+    canonical = find_link_rel(get_dom_snapshot(driver), 'canonical')
     if canonical:
-        href = canonical[0].get_attribute("href")
+        href = canonical[0]['href']
         return True, href
     return False, "Не найден"
 
 def check_pagination_links(driver):
     """Проверяет rel=next/prev."""
-    next_link = driver.find_elements(By.XPATH, "//link[@rel='next']")
-    prev_link = driver.find_elements(By.XPATH, "//link[@rel='prev']")
-    return bool(next_link), bool(prev_link)
+    snapshot = get_dom_snapshot(driver)
+    return bool(find_link_rel(snapshot, 'next')), bool(find_link_rel(snapshot, 'prev'))
 
 def check_external_links(driver, site_url):
     """Проверяет внешние ссылки на nofollow и broken."""
     domain = re.sub(r'^https?://(www\.)?', '', site_url).rstrip('/')
-    links = driver.find_elements(By.TAG_NAME, "a")
-    external_links = [link for link in links if link.get_attribute("href") and domain not in link.get_attribute("href")]
-    nofollow_count = sum(1 for link in external_links if "nofollow" in link.get_attribute("rel").lower())
-    broken_externals = []
-    for link in external_links:
-        href = link.get_attribute("href")
-        if href and "javascript:void" not in href:
-            _, status, _, _ = check_resource(href, True)
-            if not isinstance(status, int) or status != 200:
-                broken_externals.append(href)
+    external_links = [link for link in get_dom_snapshot(driver)['anchors'] if link['href'] and domain not in link['href']]
+    nofollow_count = sum(1 for link in external_links if "nofollow" in link['rel'].lower())
+    hrefs = [link['href'] for link in external_links]
+    statuses = validate_links([href for href in hrefs if href and "javascript:void" not in href], True)
+    broken_externals = [href for href, status in statuses.items() if not isinstance(status, int) or status != 200]
     return len(external_links), nofollow_count, broken_externals
 
 def check_mirrors_and_redirects(site_url, ignore_ssl):
@@ -1297,8 +2633,9 @@ def check_duplicates(driver):
 
 def check_ads(driver):
     """Базовая проверка рекламы (кол-во iframes/скриптов от ad сетей)."""
-    ad_iframes = len(driver.find_elements(By.XPATH, "//iframe[contains(@src, 'googleads') or contains(@src, 'doubleclick')]"))
-    ad_scripts = len(driver.find_elements(By.XPATH, "//script[contains(@src, 'ads') or contains(@src, 'doubleclick')]"))
+    snapshot = get_dom_snapshot(driver)
+    ad_iframes = sum(1 for src in snapshot['iframes'] if 'googleads' in src or 'doubleclick' in src)
+    ad_scripts = sum(1 for src in snapshot['scripts'] if 'ads' in src or 'doubleclick' in src)
     total_ads = ad_iframes + ad_scripts
     if total_ads > 5:
         return True, total_ads
@@ -1361,7 +2698,7 @@ def analyze_performance(site_url, ignore_ssl):
     resolutions = [(1920, 1080), (768, 1024), (375, 667)]
     for width, height in resolutions:
         try:
-            driver_local = create_webdriver(ignore_ssl=ignore_ssl, window_size=f"{width},{height}")
+            driver_local = checkout_webdriver(ignore_ssl=ignore_ssl, window_size=f"{width},{height}")
         except Exception as e:
             log_to_file(f"Ошибка создания WebDriver для анализа производительности: {str(e)}")
             performance_data["load_times"].append(0)
@@ -1400,7 +2737,7 @@ def analyze_performance(site_url, ignore_ssl):
         finally:
             try:
                 if 'driver_local' in locals() and driver_local:
-                    driver_local.quit()
+                    checkin_webdriver(driver_local)
             except Exception as e:
                 log_to_file(f"Ошибка закрытия WebDriver в analyze_performance: {str(e)}")
     return performance_data
@@ -1531,48 +2868,26 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
     link_statuses = {}  # Для вкладки Ссылки
     sitemap_errors = []  # Для проверки sitemap в сводке
     urls_in_sitemap = []
+    sitemap_result = None  # Результат единственной проверки sitemap за аудит
     site_links = []
     total_checks = 32  # Увеличено для расширенной проверки
     current_check = 0
     log_text = ""  # Внутренняя переменная для логов
+    # Повторные запросы одних и тех же URL в рамках аудита берутся из памяти
+    response_cache, response_cache_token = begin_audit_cache(page.data.get('force_link_recheck', False))
 
-    # --- Новый блок: Получаем sitemap-ы из robots.txt и обрабатываем рекурсивно ---
-    sitemap_urls = []
+    # Crawl-delay из robots.txt задает темп запросов ко всему сайту;
+    # sitemap из robots.txt проверяются один раз в блоке SEO-файлов
     try:
         robots_url = site_url.rstrip('/') + '/robots.txt'
-        r = requests.get(robots_url, timeout=10, verify=not ignore_ssl)
+        r = http_get(robots_url, timeout=10, verify=not ignore_ssl)
         if r.status_code == 200:
-            for line in r.text.splitlines():
-                if line.strip().lower().startswith('sitemap:'):
-                    sitemap_url = line.split(':', 1)[1].strip()
-                    if sitemap_url:
-                        sitemap_urls.append(sitemap_url)
+            crawl_delay = get_robots_crawl_delay(r.text)
+            if crawl_delay:
+                host_scheduler.set_crawl_delay(urlparse(site_url).netloc, crawl_delay)
     except Exception as ex:
         pass  # robots.txt может отсутствовать — это не критично
-    if not sitemap_urls:
-        sitemap_urls = [site_url.rstrip('/') + '/sitemap.xml']
-    
-    # Собираем все ссылки из всех sitemap с поддержкой sitemap index
-    all_sitemap_links = []
-    sitemap_sources = {}
-    sitemap_errors = []
-    
-    for sitemap_url in sitemap_urls:
-        try:
-            result = process_sitemap_recursively(sitemap_url, ignore_ssl)
-            all_sitemap_links.extend(result['urls'])
-            sitemap_sources.update(result['sources'])
-            sitemap_errors.extend(result['errors'])
-        except Exception as ex:
-            sitemap_errors.append(f"Ошибка обработки {sitemap_url}: {str(ex)}")
-    
-    # Убираем дубликаты и пустые значения
-    all_sitemap_links = list(set([link for link in all_sitemap_links if link]))
-    urls_in_sitemap = all_sitemap_links
     
-    if sitemap_errors:
-        log_text += f"⚠️ Ошибки при обработке sitemap: {', '.join(sitemap_errors[:3])}{'...' if len(sitemap_errors) > 3 else ''}\n"
-    # --- Конец нового блока ---
 
     def update_progress():
         nonlocal current_check
@@ -1599,7 +2914,7 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
         anti_bot_mode = False
         try:
             start_time = time.time()
-            r = requests.get(site_url, timeout=10, verify=not ignore_ssl, allow_redirects=True)
+            r = http_get(site_url, timeout=10, verify=not ignore_ssl, allow_redirects=True)
             load_time = time.time() - start_time
             page_size = len(r.content) / 1024
             log_text += f"🔎 HTTP статус: {r.status_code}\n"
@@ -1642,9 +2957,9 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
         try:
             if anti_bot_mode:
                 log_text += "🛡️ Создание WebDriver в режиме обхода блокировок...\n"
-                driver = create_webdriver(ignore_ssl=ignore_ssl, anti_bot_mode=True)
+                driver = checkout_webdriver(ignore_ssl=ignore_ssl, anti_bot_mode=True)
             else:
-                driver = create_webdriver(ignore_ssl=ignore_ssl)
+                driver = checkout_webdriver(ignore_ssl=ignore_ssl)
             
             # Пробуем загрузить страницу
             try:
@@ -1654,8 +2969,9 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
                 log_text += f"⚠️ Ошибка загрузки страницы: {e}\n"
                 if not anti_bot_mode:
                     log_text += "🔄 Пробуем в режиме обхода блокировок...\n"
-                    driver.quit()
-                    driver = create_webdriver(ignore_ssl=ignore_ssl, anti_bot_mode=True)
+                    # Драйвер после неудачной загрузки может зависнуть — не возвращаем его в пул
+                    checkin_webdriver(driver, discard=True)
+                    driver = checkout_webdriver(ignore_ssl=ignore_ssl, anti_bot_mode=True)
                     driver.get(site_url)
                     log_text += "✅ Страница загружена в режиме обхода\n"
                 
@@ -1705,12 +3021,20 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
                     seo_errors.extend(errors)
                     seo_recs.extend(recommendations)
                 else:
-                    errors, positives, recommendations, _, page_details, sitemap_info, pages_not_in_sitemap, pages_in_sitemap_not_on_site = validate_sitemap(content, site_url, ignore_ssl)
+                    # Единственная проверка sitemap за аудит: со снимком, результат идет и в сводку sitemap
+                    def sitemap_progress(done, total):
+                        summary_area.value = f"⏳ Проверка URL из sitemap: {done}/{total}"
+                        page.update()
+
+                    site_sitemaps = get_site_sitemap_urls(site_url, ignore_ssl)
+                    sitemap_result = validate_site_sitemap(site_url, ignore_ssl, sitemap_progress, stop_event, sitemap_content=content)
+                    errors, positives, recommendations = sitemap_result['errors'], sitemap_result['positives'], sitemap_result['recommendations']
+                    urls_in_sitemap = sitemap_result['urls']
                     seo_positives.extend(positives)
                     seo_errors.extend(errors)
                     sitemap_errors = errors  # Сохраняем для сводки
                     seo_recs.extend(recommendations)
-                    log_text += f"📋 Содержимое sitemap.xml: {content[:200]}...\n"
+                    log_text += f"📋 Sitemap: {', '.join(site_sitemaps)} ({len(content)} байт)\n"
                     seo_positives.append("sitemap.xml содержит данные")
             else:
                 log_text += f"❌ {file} недоступен: {content}\n"
@@ -1812,9 +3136,9 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
         update_progress()
 
         try:
-            meta_desc = driver.find_elements(By.XPATH, "//meta[@name='description']")
+            meta_desc = find_meta(get_dom_snapshot(driver), 'description')
             if meta_desc:
-                desc_content = meta_desc[0].get_attribute("content")
+                desc_content = meta_desc['content'] or ""
                 log_text += f"📝 Мета-описание: {desc_content} (Длина: {len(desc_content)})\n"
                 seo_positives.append(f"Мета-описание: {desc_content} (Длина: {len(desc_content)})")
                 if len(desc_content) > 160:
@@ -1830,7 +3154,7 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
 
         # Проверка заголовков
         try:
-            h1_tags = driver.find_elements(By.TAG_NAME, "h1")
+            h1_tags = [h for h in get_dom_snapshot(driver)['headings'] if h['tag'] == 'h1']
             if len(h1_tags) == 1:
                 seo_positives.append("Один H1 найден")
             elif len(h1_tags) > 1:
@@ -2018,7 +3342,7 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
         # Проверка изображений
         log_text += "\n🖼 Проверка изображений\n"
         try:
-            images = driver.find_elements(By.TAG_NAME, "img")
+            images = get_dom_snapshot(driver)['images']
             html = driver.page_source
             bg_images = get_background_images(html)
             total_images = len(images) + len(bg_images)
@@ -2031,11 +3355,10 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
                 images_no_alt = []
                 images_no_title = []
                 large_images = []
-                for img in images:
-                    alt = img.get_attribute("alt")
-                    title = img.get_attribute("title")
-                    src = img.get_attribute("src") or "No src"
-                    size_kb = get_image_size(src, ignore_ssl)
+                img_attrs = [(img['src'] or "No src", img['alt'], img['title']) for img in images]
+                image_sizes = get_image_sizes([src for src, _, _ in img_attrs] + bg_images, ignore_ssl)
+                for src, alt, title in img_attrs:
+                    size_kb = image_sizes[src]
                     images_list.append({'src': src, 'alt': alt, 'title': title, 'size': size_kb})
                     if not alt:
                         images_no_alt.append(src)
@@ -2046,7 +3369,7 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
                 for bg in bg_images:
                     alt = ""  # bg images usually don't have alt/title
                     title = ""
-                    size_kb = get_image_size(bg, ignore_ssl)
+                    size_kb = image_sizes[bg]
                     images_list.append({'src': bg, 'alt': alt, 'title': title, 'size': size_kb})
                     images_no_alt.append(bg)  # Since no alt
                     images_no_title.append(bg)  # Since no title
@@ -2143,18 +3466,14 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
 
         # Проверка ссылок (битые) и сбор статусов
         try:
-            links = driver.find_elements(By.TAG_NAME, "a")
+            links = get_dom_snapshot(driver)['anchors']
             log_text += f"🔗 Ссылок: {len(links)}\n"
             general_positives.append(f"Ссылок: {len(links)}")
-            site_links = [link.get_attribute("href") for link in links if link.get_attribute("href") and site_url in link.get_attribute("href")]
-            for i, link in enumerate(links, 1):
-                href = link.get_attribute("href") or "Нет href"
-                if href and "javascript:void" not in href and not href.startswith("#"):
-                    result = check_resource(href, ignore_ssl)
-                    href, status, _, _ = result
-                    link_statuses[href] = status
-                    if not isinstance(status, int) or status != 200:
-                        broken_links.append(href)
+            hrefs = [link['href'] or "Нет href" for link in links]
+            site_links = [href for href in hrefs if href != "Нет href" and site_url in href]
+            hrefs_to_check = [href for href in hrefs if "javascript:void" not in href and not href.startswith("#")]
+            link_statuses.update(validate_links(hrefs_to_check, ignore_ssl, stop_event=stop_event))
+            broken_links.extend(href for href, status in link_statuses.items() if not isinstance(status, int) or status != 200)
         except Exception as e:
             log_to_file(f"Ошибка проверки ссылок: {str(e)}")
             general_errors.append("Не удалось проверить ссылки")
@@ -2163,40 +3482,8 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
             general_recs.append("Исправьте битые ссылки.")
         else:
             general_positives.append("Нет битых ссылок")
-        # Сравнение с sitemap (используем уже полученные данные)
-        if urls_in_sitemap:
-            # Получаем страницы сайта для сравнения
-            site_pages = get_site_pages(site_url, ignore_ssl)
-            
-            # Нормализуем URL для корректного сравнения
-            def normalize_url(url):
-                """Нормализует URL для сравнения"""
-                if not url:
-                    return url
-                url = url.rstrip('/')
-                if '#' in url:
-                    url = url.split('#')[0]
-                if '?' in url:
-                    url = url.split('?')[0]
-                return url
-            
-            # Нормализуем все URL
-            normalized_site_pages = set(normalize_url(url) for url in site_pages)
-            normalized_sitemap_urls = set(normalize_url(url) for url in urls_in_sitemap)
-            
-            # Страницы на сайте, но не в sitemap
-            pages_not_in_sitemap = [url for url in site_pages if normalize_url(url) not in normalized_sitemap_urls]
-            
-            # Страницы в sitemap, но не на сайте (недоступные)
-            # В run_test мы не имеем page_details, поэтому просто сравниваем URL
-            pages_in_sitemap_not_on_site = [url for url in urls_in_sitemap if normalize_url(url) not in normalized_site_pages]
-            
-            if pages_not_in_sitemap:
-                seo_errors.append(f"Страницы на сайте не в sitemap: {len(pages_not_in_sitemap)} ({', '.join(pages_not_in_sitemap[:5])}...)")
-                seo_recs.append("Добавьте недостающие страницы в sitemap.")
-            if pages_in_sitemap_not_on_site:
-                seo_errors.append(f"Страницы в sitemap не на сайте: {len(pages_in_sitemap_not_on_site)} ({', '.join(pages_in_sitemap_not_on_site[:5])}...)")
-                seo_recs.append("Удалите лишние страницы из sitemap или проверьте сайт.")
+        # Сравнение с sitemap уже сделано в validate_site_sitemap (SitemapCoverage),
+        # его ошибки и рекомендации попали в seo_errors/seo_recs
         update_progress()
 
         # Генерация графика производительности
@@ -2209,6 +3496,10 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
 
         log_to_file(f"{site_url} - Успешно протестирован")
 
+        # robots.txt для вкладки — последний HTTP-запрос аудита, статистика кэша после него
+        page.data['robots_summary'] = check_robots_summary(site_url, ignore_ssl)
+        perf_positives.append(f"HTTP-кэш аудита: {response_cache.summary()}")
+
         # Форматирование сводок
         seo_area = ft.TextField()
         perf_area = ft.TextField()
@@ -2243,9 +3534,7 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
                 images_summary += f"Размер: {size_emoji} {img['size']:.2f} КБ\n\n"
         page.data['images_summary'] = images_summary
 
-        page.data['robots_summary'] = check_robots_summary(site_url, ignore_ssl)
-        sitemap_summary = check_sitemap_summary(site_url, ignore_ssl)
-        page.data['sitemap_summary'] = sitemap_summary
+        page.data['sitemap_summary'] = format_sitemap_summary(sitemap_result)
 
         # Сохранение результатов
         save_results(site_url, summary_area.value, full_summary)
@@ -2257,10 +3546,12 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
     finally:
         try:
             if 'driver' in locals() and driver:
-                driver.quit()
+                checkin_webdriver(driver)
         except Exception as e:
             log_to_file(f"Ошибка закрытия WebDriver: {str(e)}")
         
+        end_audit_cache(response_cache_token, site_url)
+
         # Проверяем, была ли остановка
         if stop_event and stop_event.is_set():
             summary_area.value = "⏹ Тест остановлен пользователем"
@@ -2278,8 +3569,15 @@ def run_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_
 
 
 
-def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_bar: ft.ProgressBar, ignore_ssl: bool, target_keywords: str, max_links: int = 15000):
-    """Запускает тестирование ссылок без проверки robots и sitemap."""
+def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, progress_bar: ft.ProgressBar, ignore_ssl: bool, target_keywords: str, max_links: int = 15000, results: dict = None):
+    """Запускает тестирование ссылок без проверки robots и sitemap.
+
+    Сводки (full_summary, seo_summary, links_summary, images_summary,
+    link_statuses) сохраняются в results; по умолчанию это page.data.
+    Пакетная проверка передает отдельный словарь на каждый сайт.
+    """
+    if results is None:
+        results = page.data
     if not re.match(r'^https?://', site_url):
         summary_area.value = "❌ Неверный URL\n"
         page.update()
@@ -2310,6 +3608,8 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
     log_text = ""  # Внутренняя переменная для логов
     total_images = 0  # Инициализация переменной для изображений
     images_list = []  # Инициализация списка изображений
+    # Повторные запросы одних и тех же URL в рамках аудита берутся из памяти
+    response_cache, response_cache_token = begin_audit_cache(page.data.get('force_link_recheck', False))
 
     def update_progress():
         nonlocal current_check
@@ -2336,7 +3636,7 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
         anti_bot_mode = False
         try:
             start_time = time.time()
-            r = requests.get(site_url, timeout=5, verify=not ignore_ssl, allow_redirects=True)
+            r = http_get(site_url, timeout=5, verify=not ignore_ssl, allow_redirects=True)
             load_time = time.time() - start_time
             page_size = len(r.content) / 1024
             log_text += f"🔎 HTTP статус: {r.status_code}\n"
@@ -2379,9 +3679,9 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
         try:
             if anti_bot_mode:
                 log_text += "🛡️ Создание WebDriver в режиме обхода блокировок...\n"
-                driver = create_webdriver(ignore_ssl=ignore_ssl, anti_bot_mode=True)
+                driver = checkout_webdriver(ignore_ssl=ignore_ssl, anti_bot_mode=True)
             else:
-                driver = create_webdriver(ignore_ssl=ignore_ssl)
+                driver = checkout_webdriver(ignore_ssl=ignore_ssl)
             
             # Пробуем загрузить страницу
             try:
@@ -2391,8 +3691,9 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
                 log_text += f"⚠️ Ошибка загрузки страницы: {e}\n"
                 if not anti_bot_mode:
                     log_text += "🔄 Пробуем в режиме обхода блокировок...\n"
-                    driver.quit()
-                    driver = create_webdriver(ignore_ssl=ignore_ssl, anti_bot_mode=True)
+                    # Драйвер после неудачной загрузки может зависнуть — не возвращаем его в пул
+                    checkin_webdriver(driver, discard=True)
+                    driver = checkout_webdriver(ignore_ssl=ignore_ssl, anti_bot_mode=True)
                     driver.get(site_url)
                     log_text += "✅ Страница загружена в режиме обхода\n"
                 
@@ -2521,9 +3822,9 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
         update_progress()
 
         try:
-            meta_desc = driver.find_elements(By.XPATH, "//meta[@name='description']")
+            meta_desc = find_meta(get_dom_snapshot(driver), 'description')
             if meta_desc:
-                desc_content = meta_desc[0].get_attribute("content")
+                desc_content = meta_desc['content'] or ""
                 log_text += f"📝 Мета-описание: {desc_content} (Длина: {len(desc_content)})\n"
                 seo_positives.append(f"Мета-описание: {desc_content} (Длина: {len(desc_content)})")
                 if len(desc_content) > 160:
@@ -2539,7 +3840,7 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
 
         # Проверка заголовков
         try:
-            h1_tags = driver.find_elements(By.TAG_NAME, "h1")
+            h1_tags = [h for h in get_dom_snapshot(driver)['headings'] if h['tag'] == 'h1']
             if len(h1_tags) == 1:
                 seo_positives.append("Один H1 найден")
             elif len(h1_tags) > 1:
@@ -2727,18 +4028,13 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
         # Проверка изображений
         log_text += "\n🖼 Проверка изображений\n"
         try:
-            images = driver.find_elements(By.TAG_NAME, "img")
+            images = get_dom_snapshot(driver)['images']
             total_images = len(images)
             images_list = []
-            for img in images:
-                src = img.get_attribute("src") or "Нет src"
-                alt = img.get_attribute("alt") or ""
-                title = img.get_attribute("title") or ""
-                try:
-                    size = get_image_size(src, ignore_ssl)
-                except:
-                    size = 0
-                images_list.append({"src": src, "alt": alt, "title": title, "size": size})
+            img_attrs = [(img['src'] or "Нет src", img['alt'] or "", img['title'] or "") for img in images]
+            image_sizes = get_image_sizes([src for src, _, _ in img_attrs], ignore_ssl)
+            for src, alt, title in img_attrs:
+                images_list.append({"src": src, "alt": alt, "title": title, "size": image_sizes[src]})
             log_text += f"🖼 Изображений: {total_images}\n"
             general_positives.append(f"Изображений: {total_images}")
             if total_images == 0:
@@ -2818,27 +4114,20 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
 
         # Проверка ссылок (битые) и сбор статусов
         try:
-            links = driver.find_elements(By.TAG_NAME, "a")
+            links = get_dom_snapshot(driver)['anchors']
             log_text += f"🔗 Найдено тегов <a>: {len(links)}\n"
             
-            # Проверяем все найденные ссылки
-            links_to_check = links
-            checked_links_count = 0
-            
-            for i, link in enumerate(links_to_check, 1):
-                href = link.get_attribute("href") or "Нет href"
-                if href and "javascript:void" not in href and not href.startswith("#"):
-                    result = check_resource(href, ignore_ssl)
-                    href, status, _, _ = result
-                    link_statuses[href] = status
-                    checked_links_count += 1
-                    if not isinstance(status, int) or status != 200:
-                        broken_links.append(href)
+            # Проверяем все найденные ссылки (каждый href один раз)
+            hrefs = [link['href'] or "Нет href" for link in links]
+            hrefs_to_check = [href for href in hrefs if "javascript:void" not in href and not href.startswith("#")]
+            link_statuses.update(validate_links(hrefs_to_check, ignore_ssl, stop_event=stop_event))
+            broken_links.extend(href for href, status in link_statuses.items() if not isinstance(status, int) or status != 200)
+            checked_links_count = len(link_statuses)
             
             # Добавляем информацию о проверенных ссылках
             log_text += f"🔗 Проверено ссылок: {checked_links_count}\n"
             general_positives.append(f"Проверено ссылок: {checked_links_count}")
-            site_links = [link.get_attribute("href") for link in links if link.get_attribute("href") and site_url in link.get_attribute("href")]
+            site_links = [href for href in hrefs if href != "Нет href" and site_url in href]
         except Exception as e:
             log_to_file(f"Ошибка проверки ссылок: {str(e)}")
             general_errors.append("Не удалось проверить ссылки")
@@ -2852,12 +4141,17 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
         # Генерация графика производительности
         try:
             chart_base64 = generate_performance_chart(load_times, resource_times, js_css_times)
-            page.add(ft.Image(src_base64=chart_base64, width=800, height=500))
+            if results is page.data:
+                page.add(ft.Image(src_base64=chart_base64, width=800, height=500))
+            else:
+                results['performance_chart'] = chart_base64
         except Exception as e:
             log_to_file(f"Ошибка генерации графика: {str(e)}")
         update_progress()
 
         log_to_file(f"{site_url} - Успешно протестирован (только ссылки)")
+        # Все HTTP-проверки позади: статистика кэша попадает в сводку целиком
+        perf_positives.append(f"HTTP-кэш аудита: {response_cache.summary()}")
 
         # Форматирование сводок
         seo_area = ft.TextField()
@@ -2885,15 +4179,15 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
         links_summary_simple += f"\n💡 Проверено {len(link_statuses)} ссылок из {len(links)} найденных тегов <a>"
         
         # Сохраняем данные ссылок для детального просмотра
-        page.data['link_statuses'] = link_statuses
+        results['link_statuses'] = link_statuses
         
         summary_area.value = full_summary  # Только итоговая сводка!
-        page.data['full_summary'] = full_summary
-        page.data['seo_summary'] = seo_area.value  # Сохраняем SEO сводку отдельно
+        results['full_summary'] = full_summary
+        results['seo_summary'] = seo_area.value  # Сохраняем SEO сводку отдельно
         links_area.value = format_links_section(link_statuses)
         links_summary = check_links_summary(link_statuses)
-        page.data['links_summary'] = links_summary
-        page.data['links_summary_with_buttons'] = links_summary_with_buttons
+        results['links_summary'] = links_summary
+        results['links_summary_with_buttons'] = links_summary_with_buttons
 
         # Форматирование сводки изображений
         images_summary = "### Изображения\n\n"
@@ -2908,7 +4202,7 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
                 images_summary += f"Alt: {alt_emoji} {img['alt'] or 'Нет'}\n"
                 images_summary += f"Title: {title_emoji} {img['title'] or 'Нет'}\n"
                 images_summary += f"Размер: {size_emoji} {img['size']:.2f} КБ\n\n"
-        page.data['images_summary'] = images_summary
+        results['images_summary'] = images_summary
 
         # Сохранение результатов
         save_results(site_url, summary_area.value, full_summary)
@@ -2920,116 +4214,159 @@ def run_links_test(site_url: str, summary_area: ft.TextField, page: ft.Page, pro
     finally:
         try:
             if 'driver' in locals() and driver:
-                driver.quit()
+                checkin_webdriver(driver)
         except Exception as e:
             log_to_file(f"Ошибка закрытия WebDriver: {str(e)}")
         
+        end_audit_cache(response_cache_token, site_url)
+
         # Проверяем, была ли остановка
         if stop_event and stop_event.is_set():
             summary_area.value = "⏹ Проверка ссылок остановлена пользователем"
         else:
             progress_bar.value = 1.0
         
-        # Скрываем кнопку остановки и показываем кнопку запуска
-        page.data['links_stop_btn_visible'] = False
-        page.data['links_run_btn_visible'] = True
-        
-        # Показываем кнопки экспорта через page.data
-        page.data['links_export_btn_visible'] = True
-        page.data['links_export_word_btn_visible'] = True
+        # В пакетной проверке кнопками управляет run_multiple_links_test:
+        # завершение одного сайта не должно возвращать кнопку запуска
+        if results is page.data:
+            # Скрываем кнопку остановки и показываем кнопку запуска
+            page.data['links_stop_btn_visible'] = False
+            page.data['links_run_btn_visible'] = True
+            
+            # Показываем кнопки экспорта через page.data
+            page.data['links_export_btn_visible'] = True
+            page.data['links_export_word_btn_visible'] = True
         
         # Обновляем интерфейс
         page.update()
 
-def run_multiple_links_test(urls: list, summary_area: ft.TextField, page: ft.Page, progress_bar: ft.ProgressBar, ignore_ssl: bool, target_keywords: str):
-    """Запускает тестирование множественных ссылок без проверки robots и sitemap."""
+def read_batch_section(page: ft.Page, section: str):
+    """Текст раздела последнего пакетного отчета или None, если пакетной проверки не было."""
+    path = page.data.get('multiple_report_files', {}).get(section)
+    if not path:
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except OSError as e:
+        return f"❌ Не удалось прочитать {path}: {e}"
+
+def run_multiple_links_test(urls: list, summary_area: ft.TextField, page: ft.Page, progress_bar: ft.ProgressBar, ignore_ssl: bool, target_keywords: str, max_workers: int = MULTI_SITE_WORKERS):
+    """Запускает тестирование множественных ссылок без проверки robots и sitemap.
+
+    Сайты проверяются параллельно (не больше max_workers одновременно),
+    у каждого свой словарь результатов и свой прогресс. Каждый результат,
+    как только готов, дописывается в файлы пакетного отчета (полный и по
+    разделам) и отбрасывается; в интерфейсе остается короткая строка по
+    сайту. Состоянием кнопок на время пакета управляет только эта функция.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    urls = list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
     if not urls:
         summary_area.value = "❌ Нет ссылок для проверки\n"
         page.update()
         return
 
-    all_results = []
-    all_seo_summaries = []
-    all_links_summaries = []
-    all_images_summaries = []
-    all_full_summaries = []
     total_urls = len(urls)
-    current_url = 0
-    
+    finished = 0
+    stop_event = page.data.get('stop_event')
+    started_at = datetime.now()
+    report_base = f"{REPORT_DIR}/links_batch_{started_at.strftime('%Y%m%d_%H%M%S')}"
+    report_path = f"{report_base}.txt"
+    section_paths = {key: f"{report_base}_{suffix}.md" for key, (suffix, _) in BATCH_REPORT_SECTIONS.items()}
+    site_progress = {}  # url -> ProgressBar, который обновляет run_links_test
+
+    def check_site(url):
+        """Проверяет один сайт и возвращает его изолированные результаты."""
+        site_results = {}
+        temp_summary = ft.TextField()
+        run_links_test(url, temp_summary, page, site_progress[url], ignore_ssl, target_keywords, 15000, results=site_results)
+        site_results['summary'] = temp_summary.value
+        return site_results
+
+    def render_progress(new_lines):
+        # Готовые строки дописываются к накопленному тексту, весь список заново не склеивается
+        nonlocal finished_text
+        if new_lines:
+            finished_text += "".join(f"{line}\n" for line in new_lines)
+        active = "".join(f"⏳ {url} — {int((bar.value or 0) * 100)}%\n" for url, bar in site_progress.items() if url in running)
+        done_part = sum(bar.value or 0 for url, bar in site_progress.items() if url in running)
+        progress_bar.value = min((finished + done_part) / total_urls, 1.0)
+        summary_area.value = (f"🔄 Проверка {total_urls} ссылок: готово {finished}/{total_urls}, "
+                              f"параллельно {max_workers}\n📄 Отчет: {report_path}\n\n"
+                              + active + finished_text)
+        page.update()
+
     summary_area.value = f"🔄 Начинаем проверку {total_urls} ссылок...\n"
+    # Кнопки разделов читают отчет с диска, поэтому готовые сайты видны еще до конца пакета
+    page.data['multiple_report_files'] = {BATCH_REPORT_SECTIONS[key][0]: path for key, path in section_paths.items()}
     page.update()
 
-    # Ограничиваем количество ссылок для оптимизации
-    max_urls_per_batch = 1000  # Максимум 1000 ссылок за раз
-    if total_urls > max_urls_per_batch:
-        summary_area.value += f"⚠️ Ограничиваем проверку до {max_urls_per_batch} ссылок для оптимизации\n"
-        urls = urls[:max_urls_per_batch]
-        total_urls = len(urls)
+    finished_text = ""  # Короткие строки готовых сайтов для интерфейса
+    running = set()
+    with contextlib.ExitStack() as stack:
+        report = stack.enter_context(open(report_path, 'w', encoding='utf-8'))
+        sections = {key: stack.enter_context(open(path, 'w', encoding='utf-8')) for key, path in section_paths.items()}
+        executor = stack.enter_context(ThreadPoolExecutor(max_workers=max(1, min(max_workers, total_urls))))
+        report.write(f"# 📊 Сводка проверки {total_urls} ссылок\n\n")
+        report.write(f"**Время проверки:** {started_at.strftime('%Y-%m-%d %H:%M:%S %Z')}\n\n")
+        for key, section in sections.items():
+            section.write(BATCH_REPORT_SECTIONS[key][1] + "\n\n")
+            section.flush()
+        pending = {}
+        queue = deque(urls)
+
+        def submit_next():
+            # Новые сайты не запускаем после остановки
+            while queue and len(pending) < max_workers and not (stop_event and stop_event.is_set()):
+                url = queue.popleft()
+                site_progress[url] = ft.ProgressBar(value=0)
+                running.add(url)
+                pending[executor.submit(check_site, url)] = url
+
+        submit_next()
+        while pending:
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            new_lines = []
+            for future in done:
+                url = pending.pop(future)
+                running.discard(url)
+                del site_progress[url]
+                try:
+                    site_results = future.result()
+                    summary = site_results.get('summary') or ''
+                    for key, section in sections.items():
+                        if key in site_results:
+                            section.write(f"## 🔗 {url}\n\n{site_results[key]}\n\n{'='*60}\n\n")
+                            section.flush()
+                    statuses = site_results.get('link_statuses', {})
+                    broken = sum(1 for status in statuses.values() if not isinstance(status, int) or status != 200)
+                    line = f"{'🟢' if not broken else '🔴'} {url}: ссылок {len(statuses)}, битых {broken}"
+                except Exception as e:
+                    summary = f"❌ Ошибка проверки: {str(e)}"
+                    line = f"❌ {url}: {str(e)}"
+                finished += 1
+                new_lines.append(line)
+                report.write(f"## 🔗 {finished}. {url}\n\n{summary}\n" + "="*80 + "\n\n")
+                report.flush()
+            submit_next()
+            render_progress(new_lines)
 
-    for url in urls:
-        url = url.strip()
-        if not url:
-            continue
-            
-        current_url += 1
-        summary_area.value += f"\n📋 Проверяем {current_url}/{total_urls}: {url}\n"
-        progress_bar.value = current_url / total_urls
-        page.update()
-        
-        try:
-            # Создаем временную область для результатов одной ссылки
-            temp_summary = ft.TextField()
-            
-            # Запускаем проверку одной ссылки с увеличенным лимитом
-            run_links_test(url, temp_summary, page, progress_bar, ignore_ssl, target_keywords, 15000)
-            
-            # Сохраняем результаты
-            if hasattr(temp_summary, 'value') and temp_summary.value:
-                all_results.append({
-                    'url': url,
-                    'summary': temp_summary.value
-                })
-                
-                # Сохраняем данные для кнопок
-                if 'seo_summary' in page.data:
-                    all_seo_summaries.append(f"## 🔗 {url}\n\n{page.data['seo_summary']}\n\n{'='*60}\n\n")
-                if 'links_summary' in page.data:
-                    all_links_summaries.append(f"## 🔗 {url}\n\n{page.data['links_summary']}\n\n{'='*60}\n\n")
-                if 'images_summary' in page.data:
-                    all_images_summaries.append(f"## 🔗 {url}\n\n{page.data['images_summary']}\n\n{'='*60}\n\n")
-                if 'full_summary' in page.data:
-                    all_full_summaries.append(f"## 🔗 {url}\n\n{page.data['full_summary']}\n\n{'='*60}\n\n")
-                
-        except Exception as e:
-            all_results.append({
-                'url': url,
-                'summary': f"❌ Ошибка проверки: {str(e)}"
-            })
-    
-    # Сохраняем объединенные данные для кнопок
-    if all_seo_summaries:
-        page.data['multiple_seo_summary'] = "# 📊 SEO Анализ всех сайтов\n\n" + "".join(all_seo_summaries)
-    if all_links_summaries:
-        page.data['multiple_links_summary'] = "# 📊 Анализ ссылок всех сайтов\n\n" + "".join(all_links_summaries)
-    if all_images_summaries:
-        page.data['multiple_images_summary'] = "# 📊 Анализ изображений всех сайтов\n\n" + "".join(all_images_summaries)
-    if all_full_summaries:
-        page.data['multiple_full_summary'] = "# 📊 Общая сводка всех сайтов\n\n" + "".join(all_full_summaries)
-    
     # Формируем общую сводку
-    combined_summary = f"# 📊 Сводка проверки {total_urls} ссылок\n\n"
-    combined_summary += f"**Время проверки:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S %Z')}\n\n"
-    
-    for i, result in enumerate(all_results, 1):
-        combined_summary += f"## 🔗 {i}. {result['url']}\n\n"
-        combined_summary += result['summary']
-        combined_summary += "\n" + "="*80 + "\n\n"
+    combined_summary = f"# 📊 Сводка проверки {finished} из {total_urls} ссылок\n\n"
+    combined_summary += f"**Время проверки:** {started_at.strftime('%Y-%m-%d %H:%M:%S %Z')}\n"
+    combined_summary += f"**Полный отчет:** {report_path}\n\n"
+    if stop_event and stop_event.is_set():
+        combined_summary += "⏹ Проверка остановлена пользователем\n\n"
+    combined_summary += finished_text
     
     summary_area.value = combined_summary
-    page.data['multiple_results'] = all_results
     progress_bar.value = 1.0
     
-    # Показываем кнопки экспорта через page.data
+    # Пакет завершен: возвращаем кнопку запуска и показываем кнопки экспорта
+    page.data['links_stop_btn_visible'] = False
+    page.data['links_run_btn_visible'] = True
     page.data['links_export_btn_visible'] = True
     page.data['links_export_word_btn_visible'] = True
     
@@ -3045,7 +4382,11 @@ def run_robots_check(site_url: str, ignore_ssl: bool, page: ft.Page, robots_area
 
 def run_sitemap_check(site_url: str, ignore_ssl: bool, page: ft.Page, sitemap_area: ft.TextField, summary_area: ft.TextField):
     """Запускает отдельную проверку sitemap.xml."""
-    summary = check_sitemap_summary(site_url, ignore_ssl)
+    def progress(done, total):
+        sitemap_area.value = f"⏳ Проверка URL из sitemap: {done}/{total}"
+        page.update()
+
+    summary = check_sitemap_summary(site_url, ignore_ssl, progress, page.data.get('stop_event'))
     sitemap_area.value = summary
     summary_area.value = summary
     page.update()
@@ -3055,6 +4396,15 @@ def generate_report(summary, site_url, report_type='full', format='txt'):
     report_path = save_results(site_url, '', summary, report_type, format)
     return report_path
 
+def _write_url_sheet(writer, sheet_name, urls, status):
+    """Построчно пишет в отчет лист URL со статусом; для пустого списка лист не создается."""
+    sheet = None
+    for url in urls:
+        if sheet is None:
+            sheet = writer.book.create_sheet(sheet_name)
+            sheet.append(['URL', 'Статус'])
+        sheet.append([url, status])
+
 def generate_sitemap_excel_report(site_url, ignore_ssl):
     """Генерирует Excel отчет со всеми URL из sitemap."""
     global sitemap_export_data
@@ -3114,23 +4464,29 @@ def generate_sitemap_excel_report(site_url, ignore_ssl):
         if not working_df.empty:
             working_df.to_excel(writer, sheet_name='Доступные URL', index=False)
         
+        # Листы разностей sitemap и сайта пишутся построчно прямо из SitemapCoverage
+        coverage = sitemap_export_data.get('coverage')
+        if coverage is not None:
+            pages_not_in_sitemap = coverage.site_only()
+            pages_in_sitemap_not_on_site = coverage.sitemap_only(broken_only=True)
+        else:
+            pages_not_in_sitemap = sitemap_export_data.get('pages_not_in_sitemap', [])
+            pages_in_sitemap_not_on_site = sitemap_export_data.get('pages_in_sitemap_not_on_site', [])
+        
         # Лист со страницами на сайте, но не в sitemap
-        pages_not_in_sitemap = sitemap_export_data.get('pages_not_in_sitemap', [])
-        if pages_not_in_sitemap:
-            not_in_sitemap_df = pd.DataFrame({
-                'URL': pages_not_in_sitemap,
-                'Статус': ['На сайте, но не в sitemap'] * len(pages_not_in_sitemap)
-            })
-            not_in_sitemap_df.to_excel(writer, sheet_name='Страницы не в sitemap', index=False)
+        _write_url_sheet(writer, 'Страницы не в sitemap', pages_not_in_sitemap, 'На сайте, но не в sitemap')
         
         # Лист со страницами в sitemap, но не на сайте
-        pages_in_sitemap_not_on_site = sitemap_export_data.get('pages_in_sitemap_not_on_site', [])
-        if pages_in_sitemap_not_on_site:
-            not_on_site_df = pd.DataFrame({
-                'URL': pages_in_sitemap_not_on_site,
-                'Статус': ['В sitemap, но не на сайте'] * len(pages_in_sitemap_not_on_site)
-            })
-            not_on_site_df.to_excel(writer, sheet_name='Страницы не на сайте', index=False)
+        _write_url_sheet(writer, 'Страницы не на сайте', pages_in_sitemap_not_on_site, 'В sitemap, но не на сайте')
+        
+        # Лист с изменениями относительно прошлой проверки
+        snapshot_diff = sitemap_export_data.get('snapshot_diff')
+        if snapshot_diff:
+            diff_rows = [(url, 'Добавлен', '') for url in snapshot_diff['added']]
+            diff_rows += [(url, 'Удален', '') for url in snapshot_diff['removed']]
+            diff_rows += [(url, 'Изменен', change) for url, change in snapshot_diff['changed']]
+            if diff_rows:
+                pd.DataFrame(diff_rows, columns=['URL', 'Изменение', 'Подробности']).to_excel(writer, sheet_name='Изменения', index=False)
     
     return report_path
 
@@ -3282,7 +4638,7 @@ def generate_word_report(data, site_url, report_type='parser'):
     doc.add_paragraph("="*50)
     
     if report_type == 'parser':
-        if isinstance(data, list):
+        if isinstance(data, (list, CrawlResults)):
             # Отчет парсера
             doc.add_heading('Результаты парсинга сайта', level=1)
             
@@ -3338,35 +4694,360 @@ def generate_word_report(data, site_url, report_type='parser'):
     doc.save(report_path)
     return report_path
 
-def crawl_site_without_sitemap(start_url, ignore_ssl, update_callback, done_callback, stop_event, max_threads=20, max_pages=15000):
-    """Рекурсивно обходит все внутренние страницы сайта без использования sitemap."""
-    visited = set()
-    results = []
-    lock = threading.Lock()
-    domain = urlparse(start_url).netloc
-    queue = [start_url]
-    threads = []
+class CrawlFrontier:
+    """Очередь обхода парсера: deque + общее множество уже встреченных URL.
+
+    Множество seen покрывает и URL в очереди, и уже посещенные, поэтому
+    добавление и проверка дубликата стоят O(1) независимо от размера сайта.
+    Дубликаты определяются по normalize_url: /page, /page/ и /page#x — один URL.
+    Все операции выполняются в потоке event loop парсера, блокировки не нужны.
+    """
+
+    def __init__(self, start_urls=()):
+        self.pending = deque()
+        self.seen = set()
+        self.visited_count = 0
+        for url in start_urls:
+            self.add(url)
+
+    def add(self, url):
+        """Добавляет URL в очередь, если он еще не встречался. Возвращает True при добавлении."""
+        key = normalize_url(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        self.pending.append(url)
+        return True
+
+    def pop(self):
+        """Берет следующий URL из очереди и отмечает его посещенным (None, если очередь пуста)."""
+        if not self.pending:
+            return None
+        self.visited_count += 1
+        return self.pending.popleft()
+
+    def __len__(self):
+        return len(self.pending)
+
+class CrawlStateStore:
+    """Состояние обхода парсера на диске (SQLite): очередь, посещенные URL и результаты.
+
+    Таблица crawl_results служит потоковым хранилищем результатов: в памяти
+    держатся только изменения с последней контрольной точки, а отчеты читают
+    результаты порциями через CrawlResults.
+
+    Изменения записываются одной транзакцией в checkpoint(),
+    поэтому после сбоя или остановки обход продолжается с последней контрольной
+    точки. URL отмечается посещенным только вместе с сохранением его результата:
+    страницы, которые обрабатывались в момент сбоя, будут запрошены заново.
+    """
+
+    def __init__(self, start_url, db_path=CRAWL_STATE_DB):
+        self.start_url = start_url
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self._discovered = []
+        self._completed = []
+        self._seq = 0
+        self.init_database()
+
+    def init_database(self):
+        """Создает таблицы состояния обхода."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_frontier (
+                start_url TEXT NOT NULL,
+                url TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                visited INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (start_url, url)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_results (
+                start_url TEXT NOT NULL,
+                url TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (start_url, url)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_runs (
+                start_url TEXT PRIMARY KEY,
+                finished INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self.conn.commit()
+
+    def reset(self):
+        """Удаляет сохраненное состояние обхода для start_url."""
+        cursor = self.conn.cursor()
+        for table in ('crawl_frontier', 'crawl_results', 'crawl_runs'):
+            cursor.execute(f"DELETE FROM {table} WHERE start_url = ?", (self.start_url,))
+        self.conn.commit()
+        self._discovered = []
+        self._completed = []
+        self._seq = 0
+
+    def load(self):
+        """Восстанавливает очередь обхода из последней контрольной точки или None, если ее нет."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT url, visited, seq FROM crawl_frontier WHERE start_url = ? ORDER BY seq", (self.start_url,))
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+        frontier = CrawlFrontier()
+        for url, visited, seq in rows:
+            frontier.seen.add(normalize_url(url))
+            if visited:
+                frontier.visited_count += 1
+            else:
+                frontier.pending.append(url)
+            self._seq = max(self._seq, seq + 1)
+        return frontier
+
+    def record_discovered(self, url):
+        """Запоминает новый URL очереди до следующей контрольной точки."""
+        self._discovered.append((self.start_url, url, self._seq))
+        self._seq += 1
+
+    def record_result(self, url, result):
+        """Запоминает результат обработки страницы до следующей контрольной точки."""
+        self._completed.append((url, json.dumps(result, ensure_ascii=False, default=str)))
+
+    def checkpoint(self, finished=False):
+        """Записывает накопленные изменения одной транзакцией."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO crawl_frontier (start_url, url, seq, visited) VALUES (?, ?, ?, 0)",
+                self._discovered
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO crawl_results (start_url, url, data) VALUES (?, ?, ?)",
+                [(self.start_url, url, data) for url, data in self._completed]
+            )
+            self.conn.executemany(
+                "UPDATE crawl_frontier SET visited = 1 WHERE start_url = ? AND url = ?",
+                [(self.start_url, url) for url, _ in self._completed]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO crawl_runs (start_url, finished, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+                (self.start_url, 1 if finished else 0)
+            )
+        self._discovered = []
+        self._completed = []
+
+    def close(self):
+        self.conn.close()
+
+class CrawlResults:
+    """Результаты обхода из CrawlStateStore, которые читаются с диска порциями.
+
+    Поддерживает len() и итерацию, поэтому передается в done_callback и
+    generate_word_report вместо списка, не загружая все страницы в память.
+    """
 
-    def check_redirect(url, ignore_ssl):
-        """Проверяет редиректы на странице."""
+    def __init__(self, start_url, db_path=CRAWL_STATE_DB, updated_at=None):
+        self.start_url = start_url
+        self.db_path = db_path
+        # Время последнего обновления обхода (UTC), если известно
+        self.updated_at = updated_at
+
+    def __len__(self):
+        conn = sqlite3.connect(self.db_path)
         try:
-            # Сначала делаем запрос без редиректов, чтобы увидеть исходный статус
-            r = requests.get(url, timeout=5, verify=not ignore_ssl, allow_redirects=False)
-            if r.status_code in [301, 302, 303, 307, 308]:
-                redirect_url = r.headers.get('Location', '')
-                return f"{r.status_code} → {redirect_url}"
-            return ""
-        except Exception:
-            return ""
+            return conn.execute("SELECT COUNT(*) FROM crawl_results WHERE start_url = ?", (self.start_url,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def iter_chunks(self, chunk_size=CRAWL_EXPORT_CHUNK):
+        """Выдает результаты списками по chunk_size записей в порядке сохранения."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            last_rowid = 0
+            while True:
+                rows = conn.execute(
+                    "SELECT rowid, data FROM crawl_results WHERE start_url = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (self.start_url, last_rowid, chunk_size)
+                ).fetchall()
+                if not rows:
+                    return
+                last_rowid = rows[-1][0]
+                yield [json.loads(data) for _, data in rows]
+        finally:
+            conn.close()
+
+    def __iter__(self):
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+def export_crawl_results_excel(results, report_path):
+    """Сохраняет результаты парсера в Excel построчно, без DataFrame в памяти."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    columns = None
+    for row in results:
+        if columns is None:
+            columns = list(row.keys())
+            ws.append(columns)
+        ws.append([value if isinstance(value, (int, float)) else str(value) for value in (row.get(col, '') for col in columns)])
+    if columns is None:
+        ws.append(['Ссылка', 'HTTP', 'Редирект', 'SEO', 'SEO_Details', 'Title', 'H1', 'Meta_Description', 'Canonical', 'Meta_Robots'])
+    wb.save(report_path)
+    return report_path
+
+def is_html_content_type(content_type):
+    """Проверяет, что Content-Type относится к HTML (пустой заголовок считаем HTML)."""
+    mime = (content_type or '').split(';', 1)[0].strip().lower()
+    return mime in ('', 'text/html', 'application/xhtml+xml')
+
+def get_content_charset(content_type):
+    """Возвращает charset из Content-Type или None."""
+    match = re.search(r'charset=["\']?([\w.:-]+)', content_type or '', re.I)
+    return match.group(1) if match else None
+
+def decode_html_body(body, content_type):
+    """Декодирует тело по charset из заголовка; без него отдает байты, чтобы парсер взял кодировку из <meta>."""
+    charset = get_content_charset(content_type)
+    if charset:
+        try:
+            return body.decode(charset, errors='replace')
+        except LookupError:
+            pass
+    return body
 
-    def analyze_seo_basic(soup, url):
-        """Базовый SEO анализ страницы."""
-        title = soup.title.string.strip() if soup.title and soup.title.string else ''
-        h1 = soup.find('h1').text.strip() if soup.find('h1') else ''
-        meta_desc = ''
-        meta_desc_tag = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc_tag:
-            meta_desc = meta_desc_tag.get('content', '')
+def extract_page_record(html):
+    """Извлекает SEO-данные страницы за один проход по дереву.
+
+    html — строка или байты. Возвращает компактную запись: title, h1
+    (первый), meta_description, canonical, robots и links (сырые href всех
+    ссылок). Использует lxml, без него — BeautifulSoup с тем же результатом.
+    """
+    record = {'title': '', 'h1': '', 'meta_description': '', 'canonical': '', 'robots': '', 'links': []}
+    if lxml_html is None:
+        soup = BeautifulSoup(html, 'html.parser')
+        elements = soup.find_all(['title', 'h1', 'meta', 'link', 'a'])
+        get_tag = lambda el: el.name
+        get_text = lambda el: el.get_text()
+        # BeautifulSoup отдает многозначные атрибуты (rel) списком
+        get_attr = lambda el, name: ' '.join(el.get(name)) if isinstance(el.get(name), list) else (el.get(name) or '')
+    else:
+        try:
+            try:
+                tree = lxml_html.document_fromstring(html)
+            except ValueError:
+                if not isinstance(html, str):
+                    raise
+                # Строка с объявлением кодировки в <?xml ...?> — разбираем как байты
+                tree = lxml_html.document_fromstring(html.encode('utf-8'), parser=lxml_html.HTMLParser(encoding='utf-8'))
+        except Exception:
+            return record
+        elements = tree.iter('title', 'h1', 'meta', 'link', 'a')
+        get_tag = lambda el: el.tag
+        get_text = lambda el: el.text_content()
+        get_attr = lambda el, name: el.get(name) or ''
+
+    for el in elements:
+        tag = get_tag(el)
+        if tag == 'a':
+            href = get_attr(el, 'href')
+            if href:
+                record['links'].append(href)
+        elif tag == 'meta':
+            name = get_attr(el, 'name').lower()
+            if name == 'description' and not record['meta_description']:
+                record['meta_description'] = get_attr(el, 'content')
+            elif name == 'robots' and not record['robots']:
+                record['robots'] = get_attr(el, 'content')
+        elif tag == 'link':
+            if 'canonical' in get_attr(el, 'rel').lower().split() and not record['canonical']:
+                record['canonical'] = get_attr(el, 'href')
+        elif tag == 'title' and not record['title']:
+            record['title'] = get_text(el).strip()
+        elif tag == 'h1' and not record['h1']:
+            record['h1'] = get_text(el).strip()
+    return record
+
+def format_redirect_chain(hops):
+    """Форматирует цепочку редиректов [(статус, Location), ...] в строку для отчета."""
+    return "; ".join(f"{status} → {location}" for status, location in hops)
+
+def crawl_site_without_sitemap(start_url, ignore_ssl, update_callback, done_callback, stop_event, max_concurrency=CRAWL_MAX_CONCURRENCY, max_pages=15000, stats=None, resume=False):
+    """Рекурсивно обходит все внутренние страницы сайта без использования sitemap.
+
+    Обход выполняется в одном asyncio event loop. Число одновременных
+    запросов подбирает AdaptiveConcurrency (не больше max_concurrency),
+    текущее значение передается третьим аргументом в update_callback.
+    update_callback вызывается не чаще раза в CRAWL_PROGRESS_SECONDS.
+    Если aiohttp не установлен, запросы выполняются через requests в пуле
+    потоков, интерфейс функции при этом не меняется.
+
+    Если передан словарь stats, в него пишутся счетчики обхода: pages
+    (обработано страниц), requests (отправлено запросов), redirect_hops
+    (пройдено редиректов), retries (повторов после 429/503), non_html
+    (ресурсов не-HTML) и truncated (страниц, обрезанных до
+    CRAWL_MAX_HTML_BYTES). Цепочка редиректов берется из history первого
+    ответа, поэтому requests == pages + retries.
+
+    Content-Type проверяется по заголовкам до чтения тела: PDF, изображения
+    и другие ресурсы не скачиваются и попадают в результаты только со статусом.
+
+    Темп запросов к хосту задает host_scheduler с учетом Crawl-delay из
+    robots.txt сайта и ответов 429/503.
+
+    Очередь, посещенные URL и результаты периодически сохраняются в
+    CrawlStateStore. При resume=True обход продолжается с последней
+    контрольной точки для start_url, иначе сохраненное состояние сбрасывается.
+    В done_callback передается CrawlResults: результаты не держатся в памяти.
+    """
+    if stats is None:
+        stats = {}
+    stats.update({'pages': 0, 'requests': 0, 'redirect_hops': 0, 'retries': 0, 'non_html': 0, 'truncated': 0})
+    start_url = normalize_url(start_url, strip_trailing_slash=False)
+    domain = urlparse(start_url).netloc
+    store = CrawlStateStore(start_url)
+    restored = store.load() if resume else None
+    if restored:
+        frontier = restored
+        log_to_file(f"Парсер {start_url}: продолжение обхода, посещено {frontier.visited_count}, в очереди {len(frontier)}")
+    else:
+        store.reset()
+        frontier = CrawlFrontier([start_url])
+        store.record_discovered(start_url)
+    results = CrawlResults(start_url, store.db_path)
+    result_count = len(results)
+    in_flight = 0
+    last_checkpoint = {'pages': 0, 'time': time.time()}
+    last_progress = {'time': 0.0}
+
+    def add_result(url, result):
+        nonlocal result_count
+        result_count += 1
+        store.record_result(url, result)
+        stats['pages'] += 1
+        if (stats['pages'] - last_checkpoint['pages'] >= CRAWL_CHECKPOINT_PAGES
+                or time.time() - last_checkpoint['time'] >= CRAWL_CHECKPOINT_SECONDS):
+            store.checkpoint()
+            last_checkpoint['pages'] = stats['pages']
+            last_checkpoint['time'] = time.time()
+
+    def report_progress(limiter):
+        # update_callback перерисовывает интерфейс синхронно прямо в event loop,
+        # поэтому вызываем его не на каждую страницу, а не чаще CRAWL_PROGRESS_SECONDS
+        now = time.time()
+        if now - last_progress['time'] >= CRAWL_PROGRESS_SECONDS:
+            last_progress['time'] = now
+            update_callback(frontier.visited_count, result_count, limiter.current)
+
+    def analyze_seo_basic(record):
+        """Базовый SEO анализ страницы по записи extract_page_record."""
+        title = record['title']
+        h1 = record['h1']
+        meta_desc = record['meta_description']
         
         seo_score = 0
         seo_issues = []
@@ -3395,78 +5076,188 @@ def crawl_site_without_sitemap(start_url, ignore_ssl, update_callback, done_call
         else:
             return "❌ Критично", f"Проблемы: {', '.join(seo_issues)}"
 
-    def worker():
-        while True:
-            # Проверяем сигнал остановки
-            if stop_event.is_set():
-                return
-                
-            with lock:
-                if not queue or len(visited) >= max_pages:
-                    return
-                url = queue.pop(0)
-                if url in visited:
-                    continue
-                visited.add(url)
-            try:
-                # Проверяем сигнал остановки перед запросом
-                if stop_event.is_set():
-                    return
-                    
-                # Уменьшенный таймаут для ускорения
-                r = requests.get(url, timeout=5, verify=not ignore_ssl, allow_redirects=True)
-                status = r.status_code
-                soup = BeautifulSoup(r.text, 'html.parser')
-                
-                # Проверяем редиректы
-                redirect_info = check_redirect(url, ignore_ssl)
-                
-                # Анализируем SEO
-                seo_status, seo_details = analyze_seo_basic(soup, url)
-                
-                results.append({
+    def fetch_requests(url):
+        """Потоковый запрос через requests (когда нет aiohttp)."""
+        r = http_get(url, timeout=5, verify=not ignore_ssl, allow_redirects=True, stream=True)
+        try:
+            hops = [(h.status_code, h.headers.get('Location', '')) for h in r.history]
+            content_type = r.headers.get('Content-Type', '')
+            if not is_html_content_type(content_type):
+                return r.status_code, r.headers, None, hops, False
+            body = b''
+            for chunk in r.iter_content(65536):
+                body += chunk
+                if len(body) > CRAWL_MAX_HTML_BYTES:
+                    break
+            return r.status_code, r.headers, body, hops, len(body) > CRAWL_MAX_HTML_BYTES
+        finally:
+            r.close()
+
+    async def fetch_once(session, limiter, url):
+        async with limiter.async_slot() as outcome:
+            stats['requests'] += 1
+            if session is None:
+                status, headers, body, hops, truncated = await asyncio.to_thread(fetch_requests, url)
+            else:
+                async with session.get(url, allow_redirects=True) as r:
+                    status, headers = r.status, r.headers
+                    hops = [(h.status, h.headers.get('Location', '')) for h in r.history]
+                    body, truncated = None, False
+                    # Тело читаем только у HTML и не больше CRAWL_MAX_HTML_BYTES;
+                    # остальные соединения закрываются без скачивания
+                    if is_html_content_type(headers.get('Content-Type', '')):
+                        body = b''
+                        async for chunk in r.content.iter_chunked(65536):
+                            body += chunk
+                            if len(body) > CRAWL_MAX_HTML_BYTES:
+                                truncated = True
+                                break
+            outcome['status'] = status
+            if body is not None:
+                body = decode_html_body(body[:CRAWL_MAX_HTML_BYTES], headers.get('Content-Type', ''))
+            return status, headers, body, hops, truncated
+
+    async def fetch(session, limiter, url):
+        """Выполняет один запрос с переходом по редиректам.
+
+        Возвращает (статус, заголовки, тело, цепочка редиректов, обрезано ли
+        тело). Тело равно None для ответов не-HTML, цепочка собирается из
+        history ответа: [(статус, Location), ...]. Темп запросов задает
+        host_scheduler; после 429/503 запрос повторяется.
+        """
+        for attempt in range(HOST_BACKOFF_RETRIES + 1):
+            # Ждем слот хоста до захвата лимита, чтобы ожидание не занимало лимит параллельности
+            await host_scheduler.wait_async(url)
+            response = await fetch_once(session, limiter, url)
+            if not host_scheduler.report(url, response[0], response[1]) or attempt == HOST_BACKOFF_RETRIES:
+                return response
+            stats['retries'] += 1
+
+    async def process_page(session, limiter, url):
+        try:
+            status, headers, body, hops, truncated = await fetch(session, limiter, url)
+            if body is None:
+                # Не HTML (PDF, изображения, архивы): сохраняем только статус
+                stats['non_html'] += 1
+                content_type = headers.get('Content-Type', '').split(';', 1)[0].strip()
+                add_result(url, {
                     'Ссылка': url,
                     'HTTP': status,
-                    'Редирект': redirect_info,
-                    'SEO': seo_status,
-                    'SEO_Details': seo_details,
-                    'Title': soup.title.string.strip() if soup.title and soup.title.string else '',
-                    'H1': soup.find('h1').text.strip() if soup.find('h1') else '',
-                    'Meta_Description': soup.find('meta', attrs={'name': 'description'}).get('content', '') if soup.find('meta', attrs={'name': 'description'}) else ''
-                })
-                
-                # Собираем новые ссылки
-                for a in soup.find_all('a', href=True):
-                    link = urljoin(url, a['href'])
-                    parsed = urlparse(link)
-                    if parsed.netloc == domain and link not in visited and link.startswith('http'):
-                        with lock:
-                            if link not in queue:
-                                queue.append(link)
-                
-                # Небольшая задержка для снижения нагрузки на сервер
-                time.sleep(0.05)  # 50ms задержка
-                
-                update_callback(len(visited), len(results))
-            except Exception as e:
-                results.append({
-                    'Ссылка': url,
-                    'HTTP': f"Ошибка: {str(e)}",
-                    'Редирект': '',
-                    'SEO': '❌ Ошибка',
-                    'SEO_Details': f'Ошибка при анализе: {str(e)}',
+                    'Редирект': format_redirect_chain(hops),
+                    'SEO': '➖ Не HTML',
+                    'SEO_Details': f"Ресурс {content_type}, SEO анализ не требуется",
                     'Title': '',
                     'H1': '',
-                    'Meta_Description': ''
+                    'Meta_Description': '',
+                    'Canonical': '',
+                    'Meta_Robots': ''
                 })
-                update_callback(len(visited), len(results))
-
-    for _ in range(max_threads):
-        t = threading.Thread(target=worker)
-        t.start()
-        threads.append(t)
-    for t in threads:
-        t.join()
+                report_progress(limiter)
+                return
+            if truncated:
+                stats['truncated'] += 1
+            record = extract_page_record(body)
+            
+            # Редиректы берем из того же ответа, без повторного запроса
+            redirect_info = format_redirect_chain(hops)
+            stats['redirect_hops'] += len(hops)
+            
+            # Анализируем SEO
+            seo_status, seo_details = analyze_seo_basic(record)
+            if truncated:
+                seo_details += f" (HTML больше {CRAWL_MAX_HTML_BYTES // 1024} КБ, проанализировано начало страницы)"
+            
+            # Собираем новые ссылки до сохранения результата, чтобы контрольная
+            # точка не отметила страницу посещенной без найденных на ней ссылок
+            for href in record['links']:
+                # Запрашиваем ссылку как на сайте, без одного лишь фрагмента;
+                # normalize_url — только ключ дубликатов в frontier
+                link = urldefrag(urljoin(url, href.strip()))[0]
+                if link.startswith('http') and urlsplit(normalize_url(link)).netloc == domain:
+                    if frontier.add(link):
+                        store.record_discovered(link)
+            
+            add_result(url, {
+                'Ссылка': url,
+                'HTTP': status,
+                'Редирект': redirect_info,
+                'SEO': seo_status,
+                'SEO_Details': seo_details,
+                'Title': record['title'],
+                'H1': record['h1'],
+                'Meta_Description': record['meta_description'],
+                'Canonical': record['canonical'],
+                'Meta_Robots': record['robots']
+            })
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            add_result(url, {
+                'Ссылка': url,
+                'HTTP': f"Ошибка: {str(e)}",
+                'Редирект': '',
+                'SEO': '❌ Ошибка',
+                'SEO_Details': f'Ошибка при анализе: {str(e)}',
+                'Title': '',
+                'H1': '',
+                'Meta_Description': '',
+                'Canonical': '',
+                'Meta_Robots': ''
+            })
+        report_progress(limiter)
+
+    async def worker(session, limiter, wakeup):
+        nonlocal in_flight
+        while not stop_event.is_set():
+            if frontier.visited_count >= max_pages:
+                return
+            if not frontier:
+                # Очередь пуста: если никто не обрабатывает страницы, обход завершен
+                if in_flight == 0:
+                    wakeup.set()
+                    return
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+            url = frontier.pop()
+            in_flight += 1
+            try:
+                await process_page(session, limiter, url)
+            finally:
+                in_flight -= 1
+                wakeup.set()
+
+    async def crawl():
+        await asyncio.to_thread(host_scheduler.ensure_robots, start_url, ignore_ssl)
+        limiter = AdaptiveConcurrency(initial=min(20, max_concurrency), max_limit=max_concurrency)
+        wakeup = asyncio.Event()
+        session = None
+        if aiohttp is not None:
+            session = create_aiohttp_session(ignore_ssl, max_concurrency, read_timeout=5)
+        try:
+            tasks = [asyncio.create_task(worker(session, limiter, wakeup)) for _ in range(max_concurrency)]
+            pending = set(tasks)
+            while pending:
+                _, pending = await asyncio.wait(pending, timeout=0.5)
+                # Сигнал остановки приходит из потока интерфейса — прерываем текущие запросы
+                if stop_event.is_set():
+                    for t in pending:
+                        t.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    break
+        finally:
+            if session is not None:
+                await session.close()
+
+    try:
+        asyncio.run(crawl())
+    except Exception as e:
+        log_to_file(f"Ошибка парсера {start_url}: {str(e)}")
+    finally:
+        # Финальная контрольная точка: после остановки обход можно продолжить
+        store.checkpoint(finished=not frontier and not stop_event.is_set())
+        store.close()
+    log_to_file(f"Парсер {start_url}: страниц {stats['pages']}, запросов {stats['requests']}, редиректов {stats['redirect_hops']}, повторов {stats['retries']}, не HTML {stats['non_html']}, обрезано {stats['truncated']}")
     done_callback(results)
 
 def analyze_text_content(html_content, url):
@@ -3503,15 +5294,7 @@ def analyze_text_content(html_content, url):
     
     # Получаем весь текст через Selenium (как в функции анализа склонений)
     try:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        
-        driver = webdriver.Chrome(options=chrome_options)
+        driver = checkout_webdriver()
         driver.get(url)
         
         # Получаем весь видимый текст через улучшенный JavaScript с точным подсчетом
@@ -3619,7 +5402,7 @@ def analyze_text_content(html_content, url):
             selenium_word_count = 0
             attempts = 1
         
-        driver.quit()
+        checkin_webdriver(driver)
         
         # Очищаем полученный текст
         text = re.sub(r'\s+', ' ', full_text).strip()
@@ -4349,8 +6132,13 @@ def analyze_code_content(html_content, url):
         'unclosed_tags': len(set(unclosed_tags)) if unclosed_tags else 0
     }
 
-def check_redirects(urls, ignore_ssl, update_callback, done_callback):
-    """Проверяет редиректы для списка URL."""
+def check_redirects(urls, ignore_ssl, update_callback, done_callback, max_concurrency=100):
+    """Проверяет редиректы для списка URL.
+
+    Число одновременных запросов подбирает AdaptiveConcurrency (не больше
+    max_concurrency), текущее значение передается третьим аргументом
+    в update_callback.
+    """
     import requests
     import threading
     from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -4360,7 +6148,14 @@ def check_redirects(urls, ignore_ssl, update_callback, done_callback):
     
     def check_single_url(url):
         try:
-            r = requests.get(url, timeout=5, verify=not ignore_ssl, allow_redirects=True)
+            host_scheduler.ensure_robots(url, ignore_ssl)
+            for attempt in range(HOST_BACKOFF_RETRIES + 1):
+                host_scheduler.wait(url)
+                with limiter.slot() as outcome:
+                    r = http_get(url, timeout=5, verify=not ignore_ssl, allow_redirects=True)
+                    outcome['status'] = r.status_code
+                if not host_scheduler.report(url, r.status_code, r.headers) or attempt == HOST_BACKOFF_RETRIES:
+                    break
             chain = [resp.url for resp in r.history] + [r.url] if r.history else [r.url]
             status = r.status_code
             redirected = len(chain) > 1
@@ -4380,8 +6175,10 @@ def check_redirects(urls, ignore_ssl, update_callback, done_callback):
                 'OK': False
             }
     
-    # Используем ThreadPoolExecutor для параллельной обработки
-    max_workers = min(20, len(urls))  # Максимум 20 потоков
+    # Потоков столько, сколько может разрешить адаптивный лимит; реальную
+    # параллельность ограничивает limiter
+    max_workers = max(1, min(max_concurrency, len(urls)))
+    limiter = AdaptiveConcurrency(initial=min(20, max_workers), max_limit=max_workers)
     completed = 0
     
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
@@ -4392,7 +6189,7 @@ def check_redirects(urls, ignore_ssl, update_callback, done_callback):
             with lock:
                 results.append(result)
                 completed += 1
-                update_callback(completed, len(urls))
+                update_callback(completed, len(urls), limiter.current)
     
     done_callback(results)
 
@@ -4409,6 +6206,8 @@ def main(page: ft.Page):
         use_material3=True,
     )
     page.data = {}
+    # Chrome для первой проверки запускается в фоне, пока пользователь вводит URL
+    webdriver_pool.prewarm(True)
 
     # --- Функции для получения цветов в зависимости от темы ---
     def get_text_color():
@@ -4666,6 +6465,7 @@ def main(page: ft.Page):
         label_style=ft.TextStyle(color="#394459")
     )
     ssl_checkbox = ft.Checkbox(label="Игнорировать SSL", value=True)
+    recheck_checkbox = ft.Checkbox(label="Перепроверить ссылки (без кэша)", value=False)
     run_btn = ft.ElevatedButton(
         "Запустить тест", 
         icon=ft.Icons.PLAY_ARROW,
@@ -4824,6 +6624,7 @@ def main(page: ft.Page):
 
     # --- Страница проверки ссылок ---
     links_ssl_checkbox = ft.Checkbox(label="Игнорировать SSL", value=True)
+    links_recheck_checkbox = ft.Checkbox(label="Перепроверить ссылки (без кэша)", value=False)
     links_multiple_input = ft.TextField(
         label="Ссылки для проверки (по одной на строку)", 
         width=800, 
@@ -4956,7 +6757,7 @@ def main(page: ft.Page):
     main_content.content = ft.Column([
         ft.Text("🔍 SEO Автотестер", size=24, weight=ft.FontWeight.BOLD),
         ft.Text("Введите адрес сайта для анализа и нажмите 'Запустить тест'", size=16),
-        ft.Row([url_input, ssl_checkbox, run_btn, stop_btn], spacing=10),
+        ft.Row([url_input, ssl_checkbox, recheck_checkbox, run_btn, stop_btn], spacing=10),
         progress_bar,
         ft.Row([seo_btn, robots_btn, sitemap_btn, links_btn, images_btn, full_btn, clear_btn], spacing=10),
         summary_area,
@@ -4967,7 +6768,7 @@ def main(page: ft.Page):
     links_check_content.content = ft.Column([
         ft.Text("🔗 Проверка ссылок", size=24, weight=ft.FontWeight.BOLD),
         ft.Text("Проверка ссылок без robots и sitemap. Введите ссылки для проверки (по одной на строку).", size=16),
-        ft.Row([links_ssl_checkbox, links_run_btn, links_stop_btn], spacing=10),
+        ft.Row([links_ssl_checkbox, links_recheck_checkbox, links_run_btn, links_stop_btn], spacing=10),
         links_multiple_input,
         links_progress_bar,
         ft.Row([links_seo_btn, links_links_btn, links_images_btn, links_full_btn, links_clear_btn], spacing=10),
@@ -5240,10 +7041,9 @@ def main(page: ft.Page):
 
     # --- Обработчики кнопок для страницы проверки ссылок ---
     def links_show_seo(e):
-        # Проверяем, есть ли данные для множественных сайтов
-        if 'multiple_seo_summary' in page.data:
-            summary = page.data.get('multiple_seo_summary', 'Нет данных по SEO')
-        else:
+        # Проверяем, есть ли отчет пакетной проверки
+        summary = read_batch_section(page, 'seo')
+        if summary is None:
             summary = page.data.get('seo_summary', 'Нет данных по SEO')
         links_summary_area.value = summary
         page.data['links_export_btn_visible'] = True
@@ -5253,10 +7053,9 @@ def main(page: ft.Page):
     links_seo_btn.on_click = links_show_seo
 
     def links_show_links(e):
-        # Проверяем, есть ли данные для множественных сайтов
-        if 'multiple_links_summary' in page.data:
-            detailed_summary = page.data.get('multiple_links_summary', 'Нет данных по ссылкам')
-        else:
+        # Проверяем, есть ли отчет пакетной проверки
+        detailed_summary = read_batch_section(page, 'links')
+        if detailed_summary is None:
             link_statuses = page.data.get('link_statuses', {})
             if link_statuses:
                 # Создаем детальную сводку ссылок
@@ -5268,22 +7067,12 @@ def main(page: ft.Page):
                     
                     # Добавляем дополнительную информацию о ссылке
                     try:
-                        result = check_resource(url, links_ssl_checkbox.value)
-                        href, status_code, headers, size = result
-                        detailed_summary += f"   Размер: {size:.2f} КБ\n"
-                        
-                        if headers:
-                            detailed_summary += f"   Content-Type: {headers.get('content-type', 'Не указан')}\n"
-                            detailed_summary += f"   Server: {headers.get('server', 'Не указан')}\n"
+                        record = check_link(url, links_ssl_checkbox.value, force_recheck=links_recheck_checkbox.value)
+                        detailed_summary += f"   Время ответа: {record['latency']:.2f} сек\n"
                         
                         # Проверяем редирект
-                        try:
-                            response = requests.head(url, timeout=5, verify=not links_ssl_checkbox.value, allow_redirects=False)
-                            if response.status_code in [301, 302, 303, 307, 308]:
-                                redirect_url = response.headers.get('Location', 'Не указан')
-                                detailed_summary += f"   🔄 Редирект на: {redirect_url}\n"
-                        except:
-                            pass
+                        if record['history']:
+                            detailed_summary += f"   🔄 Редирект на: {record['final_url']}\n"
                             
                     except Exception as e:
                         detailed_summary += f"   ❌ Ошибка проверки: {str(e)}\n"
@@ -5300,10 +7089,9 @@ def main(page: ft.Page):
     links_links_btn.on_click = links_show_links
 
     def links_show_images(e):
-        # Проверяем, есть ли данные для множественных сайтов
-        if 'multiple_images_summary' in page.data:
-            summary = page.data.get('multiple_images_summary', 'Нет данных по изображениям')
-        else:
+        # Проверяем, есть ли отчет пакетной проверки
+        summary = read_batch_section(page, 'images')
+        if summary is None:
             summary = page.data.get('images_summary', 'Нет данных по изображениям')
         links_summary_area.value = summary
         page.data['links_export_btn_visible'] = True
@@ -5313,10 +7101,9 @@ def main(page: ft.Page):
     links_images_btn.on_click = links_show_images
 
     def links_show_full(e):
-        # Проверяем, есть ли данные для множественных сайтов
-        if 'multiple_full_summary' in page.data:
-            summary = page.data.get('multiple_full_summary', 'Нет общей сводки')
-        else:
+        # Проверяем, есть ли отчет пакетной проверки
+        summary = read_batch_section(page, 'full')
+        if summary is None:
             summary = page.data.get('full_summary', 'Нет общей сводки')
         links_summary_area.value = summary
         page.data['links_export_btn_visible'] = True
@@ -5425,27 +7212,18 @@ def main(page: ft.Page):
             
             # Проверяем ссылку
             try:
-                result = check_resource(url, links_ssl_checkbox.value)
-                href, status, headers, size = result
-                
-                detail_info += f"📊 Статус: {status}\n"
-                detail_info += f"📏 Размер: {size} КБ\n"
-                detail_info += f"📋 Заголовки:\n"
+                record = check_link(url, links_ssl_checkbox.value, force_recheck=links_recheck_checkbox.value)
                 
-                if headers:
-                    for header, value in headers.items():
-                        detail_info += f"   {header}: {value}\n"
-                else:
-                    detail_info += "   Заголовки не получены\n"
+                detail_info += f"📊 Статус: {record['status']}\n"
+                detail_info += f"⏱ Время ответа: {record['latency']:.2f} сек\n"
+                checked_at = datetime.fromtimestamp(record['checked_at']).strftime('%Y-%m-%d %H:%M:%S')
+                detail_info += f"🕒 Проверено: {checked_at}{' (из кэша)' if record['cached'] else ''}\n"
                 
                 # Проверяем редирект
-                try:
-                    response = requests.head(url, timeout=10, verify=not links_ssl_checkbox.value, allow_redirects=False)
-                    if response.status_code in [301, 302, 303, 307, 308]:
-                        redirect_url = response.headers.get('Location', 'Не указан')
-                        detail_info += f"🔄 Редирект на: {redirect_url}\n"
-                except:
-                    detail_info += "🔄 Информация о редиректе недоступна\n"
+                if record['history']:
+                    for hop_status, location in record['history']:
+                        detail_info += f"🔄 {hop_status} → {location}\n"
+                    detail_info += f"🏁 Конечный URL: {record['final_url']}\n"
                 
             except Exception as e:
                 detail_info += f"❌ Ошибка проверки: {str(e)}\n"
@@ -5561,6 +7339,7 @@ def main(page: ft.Page):
         
         # Создаем событие для остановки
         page.data['stop_event'] = threading.Event()
+        page.data['force_link_recheck'] = recheck_checkbox.value
         
         run_test(
             url_input.value.strip(),
@@ -5613,6 +7392,7 @@ def main(page: ft.Page):
         
         # Создаем событие для остановки
         page.data['stop_event'] = threading.Event()
+        page.data['force_link_recheck'] = links_recheck_checkbox.value
         
         # Проверяем, есть ли ссылки для проверки
         if multiple_urls_text:
@@ -5764,7 +7544,7 @@ def main(page: ft.Page):
                 
                 # Проверяем мета-теги
                 try:
-                    response = requests.get(url, timeout=10, verify=not ignore_ssl)
+                    response = http_get(url, timeout=10, verify=not ignore_ssl)
                     if response.status_code == 200:
                         soup = BeautifulSoup(response.text, 'html.parser')
                         
@@ -6369,6 +8149,7 @@ def main(page: ft.Page):
         label_style=ft.TextStyle(color=get_label_color())
     )
     parser_ssl_checkbox = ft.Checkbox(label="Игнорировать SSL", value=True)
+    parser_resume_checkbox = ft.Checkbox(label="Продолжить прерванный обход", value=False)
     parser_max_pages = ft.TextField(
         label="Макс. страниц", 
         value="1000", 
@@ -6423,6 +8204,7 @@ def main(page: ft.Page):
     # Переменные для управления парсером
     parser_stop_event = threading.Event()
     parser_thread = None
+    parser_stats = {}
 
     def stop_parser(e):
         """Останавливает парсер."""
@@ -6438,24 +8220,34 @@ def main(page: ft.Page):
             page.snack_bar.open = True
             page.update()
 
-    def parser_update(visited_count, found_count):
+    def parser_update(visited_count, found_count, concurrency=None):
         if parser_stop_event.is_set():
             parser_status.value = f"Останавливаем... Обработано страниц: {visited_count}"
         else:
             parser_progress.value = min(1.0, found_count / max(visited_count, 1))
+            if concurrency is not None:
+                parser_status.value = f"Обработано страниц: {found_count} | параллельных запросов: {concurrency}"
         page.update()
 
 
 
     def parser_done(results):
+        total_results = len(results)
         # Проверяем, была ли остановка
         if parser_stop_event.is_set():
-            parser_status.value = f"Парсер остановлен. Обработано страниц: {len(results)}"
+            parser_status.value = f"Парсер остановлен. Обработано страниц: {total_results}"
         else:
-            parser_status.value = f"Парсинг завершен. Найдено страниц: {len(results)}"
+            parser_status.value = f"Парсинг завершен. Найдено страниц: {total_results}"
+        if parser_stats.get('pages'):
+            parser_status.value += (f" | HTTP-запросов: {parser_stats['requests']}"
+                                    f" ({parser_stats['requests'] / parser_stats['pages']:.2f} на страницу),"
+                                    f" редиректов: {parser_stats['redirect_hops']},"
+                                    f" повторов после 429/503: {parser_stats['retries']}")
         
         parser_table.rows = []
-        for r in results:
+        if total_results > PARSER_TABLE_LIMIT:
+            parser_status.value += f" (в таблице первые {PARSER_TABLE_LIMIT}, полный список — в экспорте)"
+        for r in islice(results, PARSER_TABLE_LIMIT):
             # Формируем читаемую SEO информацию
             title = r['Title'] if r['Title'] else 'Отсутствует'
             description = r['Meta_Description'] if r['Meta_Description'] else 'Отсутствует'
@@ -6486,19 +8278,17 @@ def main(page: ft.Page):
         parser_run_btn.visible = True
         parser_stop_btn.visible = False
         
-        parser_export_btn.visible = True if results else False
-        parser_export_word_btn.visible = True if results else False
+        parser_export_btn.visible = True if total_results else False
+        parser_export_word_btn.visible = True if total_results else False
         parser_status.visible = True
         
         # Сохраняем данные для экспорта
         page.data['parser_results'] = results
         page.data['parser_site_url'] = parser_url_input.value.strip()
         
-        # Сохраняем в Excel
-        import pandas as pd
-        df = pd.DataFrame(results)
+        # Сохраняем в Excel порциями из хранилища результатов
         fname = f"reports/allpages_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        df.to_excel(fname, index=False)
+        export_crawl_results_excel(results, fname)
         
         # Показываем уведомление о сохранении
         page.snack_bar = ft.SnackBar(content=ft.Text(f"✅ Excel отчет сохранен: {os.path.basename(fname)}"))
@@ -6537,6 +8327,7 @@ def main(page: ft.Page):
             page.update()
 
     def parser_run(e):
+        nonlocal parser_thread
         url = parser_url_input.value.strip()
         if not url.startswith('http'):
             parser_status.value = "Введите корректный URL!"
@@ -6550,7 +8341,7 @@ def main(page: ft.Page):
         parser_progress.value = 0.0
         parser_table.rows = []
         parser_export_btn.visible = False
-        parser_status.value = "Начинаем парсинг сайта..."
+        parser_status.value = "Продолжаем прерванный обход..." if parser_resume_checkbox.value else "Начинаем парсинг сайта..."
         parser_status.visible = True
         parser_run_btn.visible = False
         parser_stop_btn.visible = True
@@ -6562,7 +8353,7 @@ def main(page: ft.Page):
             max_pages = 15000
         
         def parser_worker():
-            crawl_site_without_sitemap(url, parser_ssl_checkbox.value, parser_update, parser_done, parser_stop_event, max_pages=max_pages)
+            crawl_site_without_sitemap(url, parser_ssl_checkbox.value, parser_update, parser_done, parser_stop_event, max_pages=max_pages, stats=parser_stats, resume=parser_resume_checkbox.value)
         
         parser_thread = threading.Thread(target=parser_worker)
         parser_thread.start()
@@ -6595,7 +8386,7 @@ def main(page: ft.Page):
     parser_content.content = ft.Column([
         ft.Text("Парсер всех страниц сайта", size=20, weight=ft.FontWeight.BOLD, color=get_text_color()),
         ft.Text("Введите главную страницу сайта. Парсер найдет все внутренние ссылки и покажет SEO информацию в таблице.", size=14, color=get_secondary_text_color()),
-        ft.Row([parser_url_input, parser_ssl_checkbox, parser_max_pages, parser_run_btn, parser_stop_btn]),
+        ft.Row([parser_url_input, parser_ssl_checkbox, parser_resume_checkbox, parser_max_pages, parser_run_btn, parser_stop_btn]),
         parser_progress,
         ft.Container(
             ft.Row([
@@ -6737,20 +8528,14 @@ def main(page: ft.Page):
         def worker():
             try:
                 # Получаем HTML страницы через Selenium (как в функции анализа склонений)
-                from selenium import webdriver
-                from selenium.webdriver.chrome.options import Options
-                
-                chrome_options = Options()
-                chrome_options.add_argument('--headless')
-                chrome_options.add_argument('--no-sandbox')
-                chrome_options.add_argument('--disable-dev-shm-usage')
-                
-                driver = webdriver.Chrome(options=chrome_options)
-                driver.get(url)
-                
-                # Получаем HTML после загрузки страницы
-                html_content = driver.page_source
-                driver.quit()
+                driver = checkout_webdriver()
+                try:
+                    driver.get(url)
+                    
+                    # Получаем HTML после загрузки страницы
+                    html_content = driver.page_source
+                finally:
+                    checkin_webdriver(driver)
                 
                 # Анализируем текст
                 analysis = analyze_text_content(html_content, url)
@@ -6966,28 +8751,21 @@ def main(page: ft.Page):
         def worker():
             try:
                 # Получаем HTML страницы
-                response = requests.get(url, timeout=15, verify=not text_analysis_ssl_checkbox.value)
+                response = http_get(url, timeout=15, verify=not text_analysis_ssl_checkbox.value)
                 if response.status_code != 200:
                     text_analysis_status.value = f"Ошибка загрузки страницы: {response.status_code}"
                     page.update()
                     return
                 
-                # Создаем драйвер для анализа ключевых слов
-                from selenium import webdriver
-                from selenium.webdriver.chrome.options import Options
-                
-                chrome_options = Options()
-                chrome_options.add_argument('--headless')
-                chrome_options.add_argument('--no-sandbox')
-                chrome_options.add_argument('--disable-dev-shm-usage')
-                
-                driver = webdriver.Chrome(options=chrome_options)
-                driver.get(url)
-                
-                # Анализируем ключевые слова с учетом склонений
-                keywords_result, density, target_analysis = analyze_keywords(driver, url, keywords)
-                
-                driver.quit()
+                # Берем драйвер из пула для анализа ключевых слов
+                driver = checkout_webdriver()
+                try:
+                    driver.get(url)
+                    
+                    # Анализируем ключевые слова с учетом склонений
+                    keywords_result, density, target_analysis = analyze_keywords(driver, url, keywords)
+                finally:
+                    checkin_webdriver(driver)
                 
                 # Формируем сводку анализа склонений
                 declensions_text = []
@@ -7178,7 +8956,7 @@ def main(page: ft.Page):
         def worker():
             try:
                 # Получаем HTML страницы
-                response = requests.get(url, timeout=15, verify=not code_analysis_ssl_checkbox.value)
+                response = http_get(url, timeout=15, verify=not code_analysis_ssl_checkbox.value)
                 if response.status_code != 200:
                     code_analysis_status.value = f"Ошибка загрузки страницы: {response.status_code}"
                     page.update()
@@ -7510,8 +9288,11 @@ def main(page: ft.Page):
     )
     redirects_status = ft.Text(visible=False)
 
-    def redirects_update(done, total):
+    def redirects_update(done, total, concurrency=None):
         redirects_progress.value = min(1.0, done / max(total, 1))
+        if concurrency is not None:
+            redirects_status.value = f"Проверено: {done} из {total} | параллельных запросов: {concurrency}"
+            redirects_status.visible = True
         page.update()
 
     def redirects_done(results):
@@ -7666,7 +9447,7 @@ def main(page: ft.Page):
             for url in urls:
                 try:
                     t0 = time.time()
-                    r = requests.get(url, timeout=15, verify=False)
+                    r = http_get(url, timeout=15, verify=False)
                     load_time = time.time() - t0
                     soup = BeautifulSoup(r.text, 'html.parser')
                     h1 = len(soup.find_all('h1'))
@@ -7683,7 +9464,7 @@ def main(page: ft.Page):
                     # sitemap
                     sitemap_url = url.rstrip('/') + '/sitemap.xml'
                     try:
-                        r_s = requests.get(sitemap_url, timeout=10, verify=False)
+                        r_s = http_get(sitemap_url, timeout=10, verify=False)
                         if r_s.status_code == 200:
                             root = ET.fromstring(r_s.text)
                             sitemap_count = len([u for u in root.iter('{http://www.sitemaps.org/schemas/sitemap/0.9}url')])
@@ -8056,88 +9837,5 @@ def get_microdata(driver):
         log_to_file(f"Ошибка получения микроразметки: {str(ex)}")
         return [], [], {}, {}
 
-def process_sitemap_recursively(sitemap_url, ignore_ssl, visited_sitemaps=None, max_depth=3):
-    """
-    Рекурсивно обрабатывает sitemap index файлы и собирает все URL с метаданными.
-    
-    Args:
-        sitemap_url: URL sitemap файла
-        ignore_ssl: Игнорировать SSL ошибки
-        visited_sitemaps: Множество уже посещенных sitemap (для предотвращения циклов)
-        max_depth: Максимальная глубина рекурсии
-    
-    Returns:
-        dict: Словарь с информацией о найденных URL, их источниках и метаданных
-    """
-    if visited_sitemaps is None:
-        visited_sitemaps = set()
-    
-    if max_depth <= 0 or sitemap_url in visited_sitemaps:
-        return {
-            'urls': [], 
-            'sources': {}, 
-            'metadata': {},  # Метаданные для каждого URL
-            'errors': [f"Достигнута максимальная глубина или циклическая ссылка: {sitemap_url}"]
-        }
-    
-    visited_sitemaps.add(sitemap_url)
-    result = {'urls': [], 'sources': {}, 'metadata': {}, 'errors': []}
-    
-    try:
-        response = requests.get(sitemap_url, timeout=10, verify=not ignore_ssl)
-        if response.status_code != 200:
-            result['errors'].append(f"Не удалось загрузить sitemap: {sitemap_url} (статус: {response.status_code})")
-            return result
-        
-        root = ET.fromstring(response.text)
-        
-        # Проверяем, это sitemap index или обычный sitemap
-        if 'sitemapindex' in root.tag:
-            # Это sitemap index - обрабатываем рекурсивно
-            sitemap_elems = root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}sitemap')
-            for sitemap_elem in sitemap_elems:
-                sub_sitemap_url = sitemap_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                if sub_sitemap_url:
-                    sub_result = process_sitemap_recursively(
-                        sub_sitemap_url, 
-                        ignore_ssl, 
-                        visited_sitemaps.copy(), 
-                        max_depth - 1
-                    )
-                    result['urls'].extend(sub_result['urls'])
-                    result['sources'].update(sub_result['sources'])
-                    result['metadata'].update(sub_result['metadata'])
-                    result['errors'].extend(sub_result['errors'])
-        
-        elif 'urlset' in root.tag:
-            # Это обычный sitemap - извлекаем URL с метаданными
-            url_elems = root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}url')
-            for url_elem in url_elems:
-                url = url_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                if url:
-                    result['urls'].append(url)
-                    result['sources'][url] = sitemap_url
-                    
-                    # Извлекаем метаданные
-                    lastmod = url_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}lastmod') or '-'
-                    priority = url_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}priority') or '-'
-                    changefreq = url_elem.findtext('{http://www.sitemaps.org/schemas/sitemap/0.9}changefreq') or '-'
-                    
-                    result['metadata'][url] = {
-                        'lastmod': lastmod,
-                        'priority': priority,
-                        'changefreq': changefreq
-                    }
-        
-        else:
-            result['errors'].append(f"Неизвестный формат sitemap: {sitemap_url}")
-    
-    except ET.ParseError as e:
-        result['errors'].append(f"Ошибка парсинга XML в {sitemap_url}: {str(e)}")
-    except Exception as e:
-        result['errors'].append(f"Ошибка обработки {sitemap_url}: {str(e)}")
-    
-    return result
-
 if __name__ == "__main__":
     ft.app(target=main,  assets_dir="assets")
\ No newline at end of file
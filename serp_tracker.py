@@ -15,9 +15,8 @@ import base64
 import threading
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver import ChromeOptions
-from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_pool import WebDriverPool, create_chrome_service, wait_for_elements
 import urllib3
 import logging
 
@@ -26,6 +25,8 @@ logging.getLogger('selenium').setLevel(logging.WARNING)
 logging.getLogger('webdriver_manager').setLevel(logging.WARNING)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+SEARCH_RESULTS_TIMEOUT = 5  # Сколько секунд ждать появления выдачи поисковика
+
 class SERPTracker:
     def __init__(self, db_path="serp_tracker.db"):
         """Инициализация трекера позиций."""
@@ -211,7 +212,8 @@ class SERPTracker:
         
         return [{"position": row[0], "url": row[1], "title": row[2], "snippet": row[3], "checked_at": row[4]} for row in positions]
     
-    def create_webdriver(self, headless=True):
+    @staticmethod
+    def create_webdriver(headless=True):
         """Создает WebDriver для поиска."""
         options = ChromeOptions()
         if headless:
@@ -225,26 +227,34 @@ class SERPTracker:
         options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
         
         try:
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+            driver = webdriver.Chrome(service=create_chrome_service(), options=options)
             driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             return driver
         except Exception as e:
             print(f"Ошибка создания WebDriver: {e}")
             return None
     
+    @staticmethod
+    def checkout_driver(headless=True):
+        """Берет WebDriver из общего пула поиска или None, если Chrome не запускается."""
+        try:
+            return search_driver_pool.checkout(headless)
+        except Exception as e:
+            print(f"Ошибка создания WebDriver: {e}")
+            return None
+    
     def search_google(self, keyword, max_results=10):
         """Выполняет поиск в Google."""
-        driver = self.create_webdriver()
+        driver = self.checkout_driver()
         if not driver:
             return []
         
         try:
             search_url = f"https://www.google.com/search?q={quote_plus(keyword)}&num={max_results}"
             driver.get(search_url)
-            time.sleep(2)
             
             results = []
-            search_results = driver.find_elements(By.CSS_SELECTOR, "div.g")
+            search_results = wait_for_elements(driver, By.CSS_SELECTOR, "div.g", SEARCH_RESULTS_TIMEOUT)
             
             for i, result in enumerate(search_results[:max_results], 1):
                 try:
@@ -272,21 +282,20 @@ class SERPTracker:
             print(f"Ошибка поиска в Google: {e}")
             return []
         finally:
-            driver.quit()
+            search_driver_pool.checkin(driver)
     
     def search_yandex(self, keyword, max_results=10):
         """Выполняет поиск в Яндекс."""
-        driver = self.create_webdriver()
+        driver = self.checkout_driver()
         if not driver:
             return []
         
         try:
             search_url = f"https://yandex.ru/search/?text={quote_plus(keyword)}&numdoc={max_results}"
             driver.get(search_url)
-            time.sleep(2)
             
             results = []
-            search_results = driver.find_elements(By.CSS_SELECTOR, "li.serp-item")
+            search_results = wait_for_elements(driver, By.CSS_SELECTOR, "li.serp-item", SEARCH_RESULTS_TIMEOUT)
             
             for i, result in enumerate(search_results[:max_results], 1):
                 try:
@@ -314,7 +323,7 @@ class SERPTracker:
             print(f"Ошибка поиска в Яндекс: {e}")
             return []
         finally:
-            driver.quit()
+            search_driver_pool.checkin(driver)
     
     def check_position(self, keyword, domain, search_engine="google"):
         """Проверяет позицию сайта по ключевому слову."""
@@ -526,6 +535,15 @@ class SERPTracker:
         
         return stats
 
+def _create_pooled_search_driver(headless):
+    driver = SERPTracker.create_webdriver(headless)
+    if driver is None:
+        raise RuntimeError("Не удалось создать WebDriver")
+    return driver
+
+# Браузеры для поиска общие для всех экземпляров SERPTracker
+search_driver_pool = WebDriverPool(_create_pooled_search_driver)
+
 def run_serp_tracking(keywords_list, domain, search_engines=["google", "yandex"], update_callback=None):
     """Запускает трекинг позиций для списка ключевых слов."""
     tracker = SERPTracker()
@@ -12,9 +12,8 @@ import matplotlib.dates as mdates
 from datetime import datetime, timedelta
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver import ChromeOptions
-from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_pool import WebDriverPool, create_chrome_service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
@@ -43,17 +42,18 @@ REPORT_DIR = "reports"
 os.makedirs(REPORT_DIR, exist_ok=True)
 
 class AdvancedSERPTracker:
+    user_agents = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:120.0) Gecko/20100101 Firefox/120.0"
+    ]
+
     def __init__(self):
         self.db_init()
         self.proxies = []
-        self.user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:120.0) Gecko/20100101 Firefox/120.0"
-        ]
         self.scheduled_tasks = {}
     
     def db_init(self):
@@ -136,7 +136,8 @@ class AdvancedSERPTracker:
         conn.commit()
         conn.close()
     
-    def create_webdriver(self, use_proxy=False, proxy=None, headless=True):
+    @classmethod
+    def create_webdriver(cls, use_proxy=False, proxy=None, headless=True):
         """Создает WebDriver с расширенными настройками"""
         options = ChromeOptions()
         
@@ -161,26 +162,40 @@ class AdvancedSERPTracker:
         })
         
         # Случайный User-Agent
-        user_agent = random.choice(self.user_agents)
+        user_agent = random.choice(cls.user_agents)
         options.add_argument(f'--user-agent={user_agent}')
         
         if use_proxy and proxy:
             options.add_argument(f'--proxy-server={proxy}')
         
         try:
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+            driver = webdriver.Chrome(service=create_chrome_service(), options=options)
             driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             driver.set_page_load_timeout(30)
-            driver.implicitly_wait(10)
+            # Выдачу ждем явно (WebDriverWait), поиск заголовка/сниппета не должен ждать 10 сек
+            driver.implicitly_wait(0)
             return driver, user_agent
         except Exception as e:
             print(f"Ошибка создания WebDriver: {e}")
             return None, None
     
+    @staticmethod
+    def checkout_driver(proxy=None):
+        """Берет WebDriver из общего пула или None.
+
+        Профиль пула — прокси. User-Agent выбирается случайно при запуске
+        браузера и сохраняется, пока этот браузер переиспользуется.
+        """
+        try:
+            return advanced_driver_pool.checkout(proxy)
+        except Exception as e:
+            print(f"Ошибка создания WebDriver: {e}")
+            return None
+    
     def search_google_advanced(self, keyword, target_url, proxy=None):
         """Расширенный поиск в Google с дополнительной информацией"""
         try:
-            driver, user_agent = self.create_webdriver(use_proxy=bool(proxy), proxy=proxy)
+            driver = self.checkout_driver(proxy)
             if not driver:
                 return None, None, None, None, None
             
@@ -231,19 +246,20 @@ class AdvancedSERPTracker:
                 except:
                     continue
             
-            driver.quit()
+            advanced_driver_pool.checkin(driver)
             return position, url_found, title_found, snippet_found, response_time
             
         except Exception as e:
             print(f"Ошибка поиска в Google: {e}")
             if 'driver' in locals():
-                driver.quit()
+                # После ошибки (например, таймаута ожидания) драйвер не переиспользуем
+                advanced_driver_pool.checkin(driver, discard=True)
             return None, None, None, None, None
     
     def search_yandex_advanced(self, keyword, target_url, proxy=None):
         """Расширенный поиск в Яндекс с дополнительной информацией"""
         try:
-            driver, user_agent = self.create_webdriver(use_proxy=bool(proxy), proxy=proxy)
+            driver = self.checkout_driver(proxy)
             if not driver:
                 return None, None, None, None, None
             
@@ -294,13 +310,14 @@ class AdvancedSERPTracker:
                 except:
                     continue
             
-            driver.quit()
+            advanced_driver_pool.checkin(driver)
             return position, url_found, title_found, snippet_found, response_time
             
         except Exception as e:
             print(f"Ошибка поиска в Яндекс: {e}")
             if 'driver' in locals():
-                driver.quit()
+                # После ошибки (например, таймаута ожидания) драйвер не переиспользуем
+                advanced_driver_pool.checkin(driver, discard=True)
             return None, None, None, None, None
     
     def check_position_advanced(self, site_url, keyword, search_engine, proxy=None):
@@ -677,6 +694,15 @@ class AdvancedSERPTracker:
         
         return None
 
+def _create_pooled_advanced_driver(proxy):
+    driver, _ = AdvancedSERPTracker.create_webdriver(use_proxy=bool(proxy), proxy=proxy)
+    if driver is None:
+        raise RuntimeError("Не удалось создать WebDriver")
+    return driver
+
+# Браузеры для поиска общие для всех экземпляров AdvancedSERPTracker
+advanced_driver_pool = WebDriverPool(_create_pooled_advanced_driver)
+
 def main(page: ft.Page):
     """Главная функция расширенного SERP Tracker"""
     page.title = "Advanced SERP Tracker"
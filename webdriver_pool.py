@@ -0,0 +1,285 @@
+import os
+import re
+import json
+import atexit
+import logging
+import threading
+from urllib.parse import urlsplit
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+logger = logging.getLogger(__name__)
+
+WEBDRIVER_MAX_USES = 25  # После N выдач драйвер закрывается и запускается новый
+WEBDRIVER_MAX_IDLE = 2  # Сколько свободных драйверов держать на каждый профиль
+APP_DATA_DIR = "app_data"  # Служебные файлы приложения (кэши и состояние между запусками)
+CHROMEDRIVER_CACHE_FILE = os.path.join(APP_DATA_DIR, "chromedriver_cache.json")  # Найденный chromedriver и версия Chrome, для которой он подходит
+os.makedirs(APP_DATA_DIR, exist_ok=True)
+
+_chromedriver_path = None
+_chromedriver_resolved = False
+_chromedriver_lock = threading.Lock()
+
+
+def get_chrome_version():
+    """Версия установленного Chrome по данным ОС (без сети) или None."""
+    try:
+        from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+        return OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception as e:
+        logger.warning(f"Не удалось определить версию Chrome: {e}")
+        return None
+
+
+def _resolve_chromedriver_path():
+    """Ищет chromedriver: кэш на диске, затем ChromeDriverManager (см. get_chromedriver_path)."""
+    chrome_version = get_chrome_version()
+    chrome_major = chrome_version.split('.')[0] if chrome_version else None
+    cached = {}
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        pass
+    cached_path = cached.get('path')
+    if cached_path and not os.path.isfile(cached_path):
+        cached_path = None
+    if cached_path and (chrome_major is None or cached.get('chrome_major') == chrome_major):
+        return cached_path
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+        with open(CHROMEDRIVER_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'path': path, 'chrome_version': chrome_version, 'chrome_major': chrome_major}, f, ensure_ascii=False)
+        return path
+    except Exception as e:
+        logger.warning(f"ChromeDriverManager недоступен, используем сохраненный chromedriver: {e}")
+        return cached_path
+
+
+def get_chromedriver_path():
+    """Путь к chromedriver: один раз за процесс, с кэшем на диске.
+
+    Путь из CHROMEDRIVER_CACHE_FILE используется без обращения к
+    ChromeDriverManager, пока совпадает мажорная версия Chrome. Иначе драйвер
+    ищется через ChromeDriverManager().install() и кэш перезаписывается.
+    Если сети нет, берется последний сохраненный путь. None — драйвер не
+    найден, Selenium попробует найти его сам (Selenium Manager / PATH).
+    Параллельные вызовы ждут первый поиск и получают его результат.
+    """
+    global _chromedriver_path, _chromedriver_resolved
+    if _chromedriver_resolved:
+        return _chromedriver_path
+    with _chromedriver_lock:
+        if not _chromedriver_resolved:
+            _chromedriver_path = _resolve_chromedriver_path()
+            # Флаг ставится только после пути: иначе второй поток без
+            # блокировки получил бы None и ушел в Selenium Manager
+            _chromedriver_resolved = True
+        return _chromedriver_path
+
+
+def wait_for_elements(driver, by, value, timeout):
+    """Явное ожидание динамического контента: элементы, как только появятся, или [] по таймауту.
+
+    Драйверы создаются без неявного ожидания, поэтому обычный find_elements
+    сразу отвечает по текущему DOM; эту функцию используем только там, где
+    элементы действительно догружаются скриптами.
+    """
+    try:
+        return WebDriverWait(driver, timeout).until(EC.presence_of_all_elements_located((by, value)))
+    except TimeoutException:
+        return []
+
+
+def create_chrome_service():
+    """Service для webdriver.Chrome с закэшированным путем к chromedriver."""
+    path = get_chromedriver_path()
+    return Service(path) if path else Service()
+
+
+class WebDriverPool:
+    """Пул запущенных WebDriver с выдачей и возвратом (checkout/checkin).
+
+    Драйверы создаются фабрикой factory(profile) и хранятся отдельно для
+    каждого профиля (например, с проверкой SSL и без), поэтому настройки
+    Chrome разных режимов не смешиваются. Перед выдачей драйвер проверяется
+    на работоспособность, при возврате очищается (cookies, storage, кэш,
+    about:blank), после max_uses выдач закрывается, а замена запускается в фоне.
+    """
+
+    def __init__(self, factory, max_uses=WEBDRIVER_MAX_USES, max_idle=WEBDRIVER_MAX_IDLE):
+        self.factory = factory
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self._idle = {}  # profile -> [driver, ...]
+        self._meta = {}  # id(driver) -> {'profile', 'uses', 'window_size'}
+        self._warming = set()
+        self._closed = False
+        self._lock = threading.Lock()
+        atexit.register(self.close_all)
+
+    def _create(self, profile):
+        driver = self.factory(profile)
+        try:
+            size = driver.get_window_size()
+            window_size = (size['width'], size['height'])
+        except Exception:
+            window_size = None
+        with self._lock:
+            self._meta[id(driver)] = {'profile': profile, 'uses': 0, 'window_size': window_size}
+        return driver
+
+    def _quit(self, driver):
+        with self._lock:
+            self._meta.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Ошибка закрытия WebDriver: {e}")
+
+    @staticmethod
+    def is_alive(driver):
+        """Проверяет, что браузер отвечает и у него есть окно."""
+        try:
+            return bool(driver.window_handles) and driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def checkout(self, profile=(), window_size=None):
+        """Выдает рабочий драйвер профиля, при необходимости запускает новый.
+
+        window_size — "ширина,высота" или "ширинаxвысота"; без него окно
+        возвращается к исходному размеру профиля.
+        """
+        while True:
+            with self._lock:
+                idle = self._idle.get(profile)
+                driver = idle.pop() if idle else None
+            if driver is None:
+                driver = self._create(profile)
+                break
+            if self.is_alive(driver):
+                break
+            self._quit(driver)
+        with self._lock:
+            meta = self._meta[id(driver)]
+            meta['uses'] += 1
+        size = tuple(int(part) for part in re.split(r'[x,]', window_size)) if window_size else meta['window_size']
+        if size:
+            try:
+                driver.set_window_size(*size)
+            except Exception as e:
+                logger.warning(f"Не удалось изменить размер окна WebDriver: {e}")
+        return driver
+
+    def checkin(self, driver, discard=False):
+        """Возвращает драйвер в пул. discard=True закрывает его (например, после сбоя)."""
+        if driver is None:
+            return
+        with self._lock:
+            meta = self._meta.get(id(driver))
+        if meta is None:
+            # Драйвер создан не пулом
+            self._quit(driver)
+            return
+        profile = meta['profile']
+        if discard or self._closed or meta['uses'] >= self.max_uses or not self._reset(driver):
+            self._quit(driver)
+            self.prewarm(profile)
+            return
+        with self._lock:
+            idle = self._idle.setdefault(profile, [])
+            if len(idle) < self.max_idle:
+                idle.append(driver)
+                driver = None
+        if driver is not None:
+            self._quit(driver)
+
+    @staticmethod
+    def _window_origins(driver):
+        """Origin всех страниц, открытых в текущем окне (по истории навигации)."""
+        try:
+            entries = driver.execute_cdp_cmd('Page.getNavigationHistory', {}).get('entries', [])
+            urls = [entry.get('url', '') for entry in entries]
+        except Exception:
+            urls = []
+        urls.append(driver.current_url)
+        origins = set()
+        for url in urls:
+            parts = urlsplit(url or '')
+            if parts.scheme in ('http', 'https') and parts.netloc:
+                origins.add(f"{parts.scheme}://{parts.netloc}")
+        return origins
+
+    @classmethod
+    def _reset(cls, driver):
+        """Очищает состояние браузера между проверками; False, если очистить не удалось.
+
+        Cookies чистятся через CDP для всего браузера, а storage (localStorage,
+        IndexedDB, service workers, Cache Storage) — для каждого origin, который
+        открывался в окнах драйвера: Storage.clearDataForOrigin принимает
+        только конкретный origin. Все это делается до перехода на about:blank,
+        пока история окон еще известна.
+        """
+        try:
+            handles = driver.window_handles
+            origins = set()
+            for handle in reversed(handles):
+                driver.switch_to.window(handle)
+                origins |= cls._window_origins(driver)
+                if handle != handles[0]:
+                    driver.close()
+            driver.switch_to.window(handles[0])
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            for origin in origins:
+                driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+            try:
+                # Чтобы замеры скорости следующей проверки шли с пустым кэшем
+                driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+            except Exception:
+                pass
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    def prewarm(self, profile=(), count=1):
+        """Запускает драйверы профиля в фоне, чтобы следующая выдача не ждала старта Chrome."""
+        with self._lock:
+            if self._closed or profile in self._warming or len(self._idle.get(profile, [])) >= count:
+                return
+            self._warming.add(profile)
+
+        def worker():
+            try:
+                while True:
+                    with self._lock:
+                        if self._closed or len(self._idle.get(profile, [])) >= min(count, self.max_idle):
+                            break
+                    driver = self._create(profile)
+                    with self._lock:
+                        if not self._closed:
+                            self._idle.setdefault(profile, []).append(driver)
+                            driver = None
+                    if driver is not None:
+                        self._quit(driver)
+                        break
+            except Exception as e:
+                logger.warning(f"Ошибка предварительного запуска WebDriver: {e}")
+            finally:
+                with self._lock:
+                    self._warming.discard(profile)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def close_all(self):
+        """Закрывает свободные драйверы и запрещает новые (вызывается при выходе)."""
+        with self._lock:
+            self._closed = True
+            drivers = [driver for idle in self._idle.values() for driver in idle]
+            self._idle.clear()
+        for driver in drivers:
+            self._quit(driver)